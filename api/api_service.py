@@ -1,9 +1,12 @@
 import os
 import requests
 import time
+import uuid
 from dotenv import load_dotenv
 from typing import Dict, Any, Optional, Tuple, Callable
 import logging
+from api.event_channel import EventChannel
+from utils.config import get_config
 load_dotenv()
 
 class APIService:
@@ -14,6 +17,9 @@ class APIService:
     - Request queueing for time-related events
     - Error handling and retries
     - Centralized endpoint configuration
+    - Timeout and retry limits that follow the live application config
+    - Optional persistent WebSocket channel for timer events and server commands,
+      with automatic fallback to HTTP
     """
 
     def __init__(self):
@@ -22,28 +28,83 @@ class APIService:
         self.refresh_token = None
         self.user_data = None
         self.logger = self._setup_logger()
-        self.request_timeout = 10  # seconds
-        self.max_retries = 3
+        self.config = get_config()
+        self.request_timeout = self.config.get("request_timeout")  # seconds
+        self.max_retries = self.config.get("max_retries")
         self.token_refresh_callback = None
+        self.command_callback = None
+        self.channel = None
+        self.config.subscribe(self._apply_config)
 
     def _setup_logger(self) -> logging.Logger:
         """Configure logging for API operations"""
         logger = logging.getLogger("api_service")
         logger.setLevel(logging.INFO)
         
-        # Create console handler and set formatter
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # The logger is shared by every APIService instance; only attach the handler once
+        if not logger.handlers:
+            # Create console handler and set formatter
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
         
         return logger
 
+    def _apply_config(self, changes: Dict[str, Any]) -> None:
+        """Pick up timeout and retry limits pushed through the config"""
+        if "request_timeout" in changes:
+            self.request_timeout = changes["request_timeout"]
+        if "max_retries" in changes:
+            self.max_retries = changes["max_retries"]
+
     def set_auth_token(self, token: str, refresh_token: str, user_data: Dict[str, Any]) -> None:
         """Set the authentication token, refresh token and user data for subsequent requests"""
         self.token = token
         self.refresh_token = refresh_token
         self.user_data = user_data
+        
+        if self.channel is not None:
+            self.channel.reauthenticate()
+        else:
+            self.connect_event_channel()
+    
+    def set_command_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Set a callback for commands pushed by the server over the event channel
+        
+        The callback runs on the channel's background thread.
+        """
+        self.command_callback = callback
+        if self.channel is not None:
+            self.channel.on_command = callback
+    
+    def _event_channel_url(self) -> Optional[str]:
+        """Configured WebSocket URL; "auto" derives it from the API base URL"""
+        url = self.config.get("event_channel_url")
+        if url.lower() == "auto" and self.base_url:
+            url = self.base_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+            url = f"{url.rstrip('/')}/events"
+        return url or None
+    
+    def connect_event_channel(self, url: Optional[str] = None) -> bool:
+        """
+        Open the persistent event channel, if one is configured
+        
+        Returns:
+            bool: True if a channel was started (it connects in the background)
+        """
+        url = url or self._event_channel_url()
+        if not url or not self.token or self.channel is not None:
+            return False
+        self.channel = EventChannel(url, lambda: self.token, self.logger, self.command_callback,
+                                    connect_timeout=self.request_timeout)
+        self.channel.start()
+        return True
+    
+    def disconnect_event_channel(self) -> None:
+        if self.channel is not None:
+            self.channel.stop()
+            self.channel = None
     
     def set_token_refresh_callback(self, callback: Callable[[str], Tuple[str, str]]) -> None:
         """Set a callback function that will be called when a token needs to be refreshed
@@ -54,6 +115,7 @@ class APIService:
     
     def clear_auth_token(self) -> None:
         """Clear the authentication token on logout"""
+        self.disconnect_event_channel()
         self.token = None
         self.refresh_token = None
         self.user_data = None
@@ -92,6 +154,8 @@ class APIService:
                 self.token = new_token
                 self.refresh_token = new_refresh_token
                 self.logger.info("Access token refreshed successfully")
+                if self.channel is not None:
+                    self.channel.reauthenticate()
                 return True
             else:
                 self.logger.error("Token refresh failed: Invalid tokens returned")
@@ -103,7 +167,8 @@ class APIService:
     
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
                      files: Optional[Dict] = None, retry_count: int = 0, 
-                     token_refresh_attempt: bool = False) -> Optional[Dict]:
+                     token_refresh_attempt: bool = False,
+                     extra_headers: Optional[Dict[str, str]] = None) -> Optional[Dict]:
         """
         Make an HTTP request with retry logic, error handling, and token refresh
         
@@ -114,6 +179,7 @@ class APIService:
             files: Files to upload
             retry_count: Current retry attempt number
             token_refresh_attempt: Whether this request is after a token refresh attempt
+            extra_headers: Additional headers for this request (e.g. Idempotency-Key)
             
         Returns:
             Response data as dictionary or None if failed
@@ -123,6 +189,8 @@ class APIService:
             key: val for key, val in self._get_headers().items() 
             if key != "Content-Type"  # Remove Content-Type when uploading files
         }
+        if extra_headers:
+            headers.update(extra_headers)
         
         try:
             if method.upper() == "GET":
@@ -144,7 +212,7 @@ class APIService:
                 self.logger.info("Received 401 Unauthorized - attempting token refresh")
                 if self._refresh_token():
                     # Retry the request with the new token
-                    return self._make_request(method, endpoint, data, files, retry_count, True)
+                    return self._make_request(method, endpoint, data, files, retry_count, True, extra_headers)
                 else:
                     self.logger.error("Token refresh failed, unable to retry request")
                     return None
@@ -157,7 +225,7 @@ class APIService:
             if retry_count < self.max_retries:
                 self.logger.info(f"Retrying request ({retry_count + 1}/{self.max_retries})...")
                 time.sleep(1)  # Wait 1 second before retrying
-                return self._make_request(method, endpoint, data, files, retry_count + 1, token_refresh_attempt)
+                return self._make_request(method, endpoint, data, files, retry_count + 1, token_refresh_attempt, extra_headers)
             return None
             
         except requests.exceptions.Timeout as e:
@@ -165,7 +233,7 @@ class APIService:
             if retry_count < self.max_retries:
                 self.logger.info(f"Retrying request ({retry_count + 1}/{self.max_retries})...")
                 time.sleep(1)
-                return self._make_request(method, endpoint, data, files, retry_count + 1, token_refresh_attempt)
+                return self._make_request(method, endpoint, data, files, retry_count + 1, token_refresh_attempt, extra_headers)
             return None
             
         except requests.exceptions.HTTPError as e:
@@ -181,9 +249,10 @@ class APIService:
         """Make a GET request"""
         return self._make_request("GET", endpoint)
     
-    def post(self, endpoint: str, data: Optional[Dict] = None, files: Optional[Dict] = None) -> Optional[Dict]:
+    def post(self, endpoint: str, data: Optional[Dict] = None, files: Optional[Dict] = None,
+             headers: Optional[Dict[str, str]] = None) -> Optional[Dict]:
         """Make a POST request"""
-        return self._make_request("POST", endpoint, data, files)
+        return self._make_request("POST", endpoint, data, files, extra_headers=headers)
     
     def put(self, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:
         """Make a PUT request"""
@@ -191,4 +260,32 @@ class APIService:
     
     def delete(self, endpoint: str) -> Optional[Dict]:
         """Make a DELETE request"""
-        return self._make_request("DELETE", endpoint)
\ No newline at end of file
+        return self._make_request("DELETE", endpoint)
+    
+    def send_event(self, endpoint: str, data: Optional[Dict] = None, retry: bool = True) -> Optional[Any]:
+        """
+        Send a timer event over the event channel when connected, otherwise via HTTP POST
+        
+        Both paths carry the same event id (as "event_id" and, over HTTP, the
+        Idempotency-Key header), so an event whose channel ack timed out after
+        it reached the server is not applied twice by the fallback.
+        
+        Args:
+            endpoint: Timer event endpoint (e.g. timer/pause)
+            data: Event payload
+            retry: Whether the HTTP fallback retries on connection errors; pass
+                False for best-effort events that must not hold up the caller
+        
+        Returns:
+            The channel acknowledgement or the HTTP response, None if both failed
+        """
+        event_id = str(uuid.uuid4())
+        if self.channel is not None:
+            reply = self.channel.send(endpoint, data, timeout=self.request_timeout, event_id=event_id)
+            if reply is not None:
+                return reply
+            self.logger.info(f"Event channel unavailable for {endpoint}, falling back to HTTP")
+        # Starting at the retry limit makes the fallback a single attempt
+        return self._make_request("POST", endpoint, {**(data or {}), "event_id": event_id},
+                                  retry_count=0 if retry else self.max_retries,
+                                  extra_headers={"Idempotency-Key": event_id})
\ No newline at end of file
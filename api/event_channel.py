@@ -0,0 +1,401 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import select
+import socket
+import ssl
+import struct
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# RFC 6455 opcodes
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+def accept_key(key: str) -> str:
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+def _apply_mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool) -> bytes:
+    """Encode a single final frame; clients must mask, servers must not"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = _apply_mask(payload, key)
+    return bytes(header) + payload
+
+
+def _read_exact(stream: Any, size: int) -> bytes:
+    data = stream.read(size)
+    if data is None or len(data) < size:
+        raise ConnectionError("WebSocket connection closed")
+    return data
+
+
+def read_message(stream: Any) -> Tuple[int, bytes]:
+    """
+    Read one message, joining continuation frames
+
+    Control frames (ping/pong/close) are returned as soon as they arrive.
+    """
+    message_opcode = None
+    chunks = []
+    size = 0
+    while True:
+        first, second = _read_exact(stream, 2)
+        fin = first & 0x80
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", _read_exact(stream, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", _read_exact(stream, 8))[0]
+        key = _read_exact(stream, 4) if second & 0x80 else None
+
+        size += length
+        if size > MAX_MESSAGE_SIZE:
+            raise ValueError("WebSocket message too large")
+        payload = _read_exact(stream, length)
+        if key:
+            payload = _apply_mask(payload, key)
+
+        if opcode >= OP_CLOSE:
+            return opcode, payload
+        if opcode != OP_CONTINUATION:
+            message_opcode = opcode
+        chunks.append(payload)
+        if fin:
+            return message_opcode, b"".join(chunks)
+
+
+class SocketReader:
+    """
+    Minimal buffered reader over a socket.
+
+    Unlike socket.makefile() it stays usable after a timeout, and it exposes
+    whether bytes are already buffered so the read loop can select() safely.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def has_data(self) -> bool:
+        pending = getattr(self.sock, "pending", None)  # Bytes decrypted but held inside an SSL socket
+        return bool(self.buffer) or bool(pending and pending())
+
+    def _fill(self) -> bool:
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            return False
+        self.buffer += chunk
+        return True
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size and self._fill():
+            pass
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self) -> bytes:
+        while b"\n" not in self.buffer and self._fill():
+            pass
+        end = self.buffer.find(b"\n") + 1 or len(self.buffer)
+        data = bytes(self.buffer[:end])
+        del self.buffer[:end]
+        return data
+
+
+class EventChannel:
+    """
+    Persistent WebSocket channel for timer events and server commands.
+
+    A background thread owns the connection:
+    - Connects, then authenticates by sending the current access token as the
+      first message (never in the URL)
+    - Reconnects with exponential backoff and jitter whenever the link drops
+    - Answers pings, sends its own pings and treats a silent link as dead
+    - Routes acks back to the waiting send() call and server commands to on_command
+
+    send() returns None whenever the channel cannot deliver, so callers can fall
+    back to HTTP. An event that timed out waiting for its ack may still have
+    reached the server; every event carries a unique id (a UUID, reused by the
+    caller's HTTP fallback) that the server can dedupe on.
+    """
+
+    def __init__(self, url: str, token_provider: Callable[[], Optional[str]],
+                 logger: Optional[logging.Logger] = None,
+                 on_command: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 ping_interval: float = 20, connect_timeout: float = 10, max_backoff: float = 30):
+        self.url = url
+        self.token_provider = token_provider
+        self.logger = logger or logging.getLogger("event_channel")
+        self.on_command = on_command
+        self.ping_interval = ping_interval
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+
+        self.sock = None
+        self.reader = None
+        self.send_lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.authenticated = threading.Event()
+        self.thread = None
+        self.waiters: Dict[str, Dict[str, Any]] = {}
+        self.waiters_lock = threading.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.authenticated.is_set()
+
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="event-channel", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self._disconnect(send_close=True)
+
+    def wait_connected(self, timeout: float) -> bool:
+        return self.authenticated.wait(timeout)
+
+    def reauthenticate(self) -> None:
+        """Send the current access token again, e.g. after a token refresh"""
+        if self.sock is None:
+            return
+        try:
+            self._send_auth()
+        except OSError as e:
+            self.logger.warning(f"Event channel re-authentication failed: {str(e)}")
+
+    def send(self, event: str, data: Optional[Dict] = None, timeout: float = 10,
+             event_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Send an event and wait for the server's acknowledgement
+
+        Args:
+            event_id: Unique id of the event; pass the same id when retrying the
+                event elsewhere so the server can drop the duplicate
+
+        Returns:
+            The ack message, or None if the channel is unavailable or the server
+            did not acknowledge the event in time
+        """
+        if not self.authenticated.is_set():
+            return None
+
+        event_id = event_id or str(uuid.uuid4())
+        waiter = {"done": threading.Event(), "reply": None}
+        with self.waiters_lock:
+            self.waiters[event_id] = waiter
+        try:
+            self._send_json({"type": "event", "id": event_id, "event": event, "data": data or {}})
+            waiter["done"].wait(timeout)
+        except OSError as e:
+            self.logger.warning(f"Event channel send failed: {str(e)}")
+            self._disconnect()
+        finally:
+            with self.waiters_lock:
+                self.waiters.pop(event_id, None)
+
+        reply = waiter["reply"]
+        if reply is None or reply.get("type") != "ack":
+            if reply is not None and reply.get("code") == 401:
+                # Token expired; the HTTP fallback will refresh it and call reauthenticate()
+                self.authenticated.clear()
+            return None
+        return reply
+
+    def _send_json(self, message: Dict[str, Any]) -> None:
+        self._send_frame(OP_TEXT, json.dumps(message).encode())
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        sock = self.sock
+        if sock is None:
+            raise OSError("Event channel is not connected")
+        with self.send_lock:
+            sock.sendall(encode_frame(opcode, payload, mask=True))
+
+    def _send_auth(self) -> None:
+        self._send_json({"type": "auth", "token": self.token_provider()})
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self.stopping.is_set():
+            try:
+                self._connect()
+                backoff = 1.0
+                self._read_loop()
+            except (OSError, ConnectionError, ValueError) as e:
+                if not self.stopping.is_set():
+                    self.logger.warning(f"Event channel disconnected: {str(e)}")
+            except Exception as e:
+                # Anything unexpected is treated as a dropped link so the channel reconnects
+                self.logger.error(f"Event channel failed: {str(e)}")
+            finally:
+                self._disconnect()
+            if self.stopping.is_set():
+                break
+            # Jittered backoff keeps a fleet from reconnecting in lockstep after an outage
+            self.stopping.wait(random.uniform(0.5, 1.0) * backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _connect(self) -> None:
+        parsed = urlparse(self.url)
+        secure = parsed.scheme == "wss"
+        host = parsed.hostname
+        port = parsed.port or (443 if secure else 80)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+
+        sock = socket.create_connection((host, port), timeout=self.connect_timeout)
+        try:
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            key = base64.b64encode(os.urandom(16)).decode()
+            sock.sendall((
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode())
+
+            reader = SocketReader(sock)
+            status_line = reader.readline().decode("latin-1")
+            headers = {}
+            while True:
+                line = reader.readline().decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if " 101 " not in f"{status_line} ":
+                raise ConnectionError(f"WebSocket handshake rejected: {status_line.strip()}")
+            if headers.get("sec-websocket-accept") != accept_key(key):
+                raise ConnectionError("WebSocket handshake failed: bad accept key")
+        except Exception:
+            sock.close()
+            raise
+
+        # A message that stalls halfway for this long means the link is dead
+        sock.settimeout(self.ping_interval * 2)
+        self.sock = sock
+        self.reader = reader
+        self._send_auth()
+
+    def _read_loop(self) -> None:
+        awaiting_pong = False
+        while not self.stopping.is_set():
+            sock = self.sock
+            if sock is None:
+                raise ConnectionError("WebSocket closed")
+            if not self.reader.has_data():
+                ready, _, _ = select.select([sock], [], [], self.ping_interval)
+                if not ready:
+                    # Idle link: ping it, and give up if the previous ping went unanswered
+                    if awaiting_pong:
+                        raise ConnectionError("WebSocket ping timed out")
+                    self._send_frame(OP_PING, b"")
+                    awaiting_pong = True
+                    continue
+
+            opcode, payload = read_message(self.reader)
+            awaiting_pong = False
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+            elif opcode == OP_CLOSE:
+                raise ConnectionError("WebSocket closed by server")
+            elif opcode == OP_TEXT:
+                self._handle_message(json.loads(payload))
+
+    def _handle_message(self, message: Any) -> None:
+        if not isinstance(message, dict):
+            self.logger.warning("Ignoring event channel message that is not a JSON object")
+            return
+        kind = message.get("type")
+        if kind == "auth_ok":
+            if not self.authenticated.is_set():
+                self.logger.info("Event channel connected")
+            self.authenticated.set()
+        elif kind == "auth_error":
+            self.logger.warning("Event channel authentication rejected")
+            self.authenticated.clear()
+        elif kind in ("ack", "error"):
+            event_id = message.get("id")
+            if not isinstance(event_id, str):
+                return  # Not a reply to anything we sent
+            with self.waiters_lock:
+                waiter = self.waiters.get(event_id)
+            if waiter is not None:
+                waiter["reply"] = message
+                waiter["done"].set()
+        elif kind == "command":
+            if self.on_command is not None:
+                try:
+                    self.on_command(message)
+                except Exception as e:
+                    self.logger.error(f"Server command handler failed: {str(e)}")
+
+    def _disconnect(self, send_close: bool = False) -> None:
+        self.authenticated.clear()
+        sock, self.sock = self.sock, None
+        if sock is None:
+            return
+        if send_close:
+            try:
+                with self.send_lock:
+                    sock.sendall(encode_frame(OP_CLOSE, struct.pack(">H", 1000), mask=True))
+            except OSError:
+                pass
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+
+        # Wake up senders still waiting on acks that will never come
+        with self.waiters_lock:
+            for waiter in self.waiters.values():
+                waiter["done"].set()
@@ -50,11 +50,23 @@ class MainWindow(QMainWindow):
         # self.stacked_widget.addWidget(self.register)  # index 1
         self.stacked_widget.addWidget(self.dashboard)  # index 2 (or 1 if no register page)
         
-        # Start with the login page
-        self.stacked_widget.setCurrentIndex(0)
+        # Start on the dashboard if a saved session exists; it is validated in the
+        # background and falls back to the login page if the server rejects it
+        session = self.dashboard.session_store.load()
+        if session:
+            self.dashboard.restore_session(session)
+            self.stacked_widget.setCurrentIndex(1)  # Dashboard
+        else:
+            # Start with the login page
+            self.stacked_widget.setCurrentIndex(0)
         
         self.setCentralWidget(self.stacked_widget)
 
+    def closeEvent(self, event):
+        # Pause the running timer on the server and persist it so it can be restored on the next launch
+        self.dashboard.shutdown()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
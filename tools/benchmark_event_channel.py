@@ -0,0 +1,105 @@
+"""
+Compare timer events sent over HTTP with the persistent WebSocket event channel.
+
+Runs entirely offline against the bundled stand-in server and reports, for each
+path, per-event latency percentiles and how many TCP connections the server had
+to accept. Also measures how long a server-pushed command takes to reach the client.
+
+Usage:
+    python -m tools.benchmark_event_channel --events 500
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+from api.api_service import APIService
+from tools.load_generator import percentile
+from tools.stub_server import StubServer
+
+
+def login(api: APIService) -> None:
+    """Log in the same way LoginWindow does"""
+    response = api._make_request('POST', "auth/login", {"email": "bench@example.com", "password": "bench"})
+    data = response.json()["data"]
+    api.set_auth_token(data["accessToken"], data["refreshToken"], {"user": data["user"]})
+
+
+def measure(send: Callable[[], object], events: int) -> List[float]:
+    latencies = []
+    for _ in range(events):
+        started = time.perf_counter()
+        if send() is None:
+            raise RuntimeError("Event was not delivered")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def print_row(name: str, latencies: List[float], connections: int) -> None:
+    values = sorted(latencies)
+    print(f"{name:<16}{len(values):>8}{statistics.mean(values) * 1000:>10.2f}"
+          f"{percentile(values, 0.50) * 1000:>9.2f}{percentile(values, 0.99) * 1000:>9.2f}"
+          f"{connections:>13}{connections / len(values):>12.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP vs WebSocket timer event benchmark")
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--commands", type=int, default=50)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), token_ttl=3600)
+    server.start_in_background()
+    counts: Dict[str, int] = server.state.counts
+
+    api = APIService()
+    logging.getLogger("api_service").setLevel(logging.WARNING)
+    api.base_url = server.base_url
+    login(api)
+    api.disconnect_event_channel()  # Measure plain HTTP first, whatever EVENT_CHANNEL_URL says
+
+    before = counts["connections"]
+    http_latencies = measure(lambda: api.post('timer/update', {}), args.events)
+    http_connections = counts["connections"] - before
+
+    received = threading.Event()
+    api.set_command_callback(lambda command: received.set())
+
+    before = counts["connections"]
+    started = time.perf_counter()
+    api.connect_event_channel(server.base_url.replace("http://", "ws://") + "/events")
+    if not api.channel.wait_connected(10):
+        raise SystemExit("Event channel did not connect")
+    connect_seconds = time.perf_counter() - started
+    ws_latencies = measure(lambda: api.channel.send('timer/update', {}), args.events)
+    ws_connections = counts["connections"] - before
+
+    command_latencies = []
+    for _ in range(args.commands):
+        received.clear()
+        started = time.perf_counter()
+        server.push_command("screenshot")
+        if not received.wait(5):
+            raise SystemExit("Server command was not delivered")
+        command_latencies.append(time.perf_counter() - started)
+
+    print(f"{'path':<16}{'events':>8}{'mean ms':>10}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'connections':>13}{'conn/event':>12}")
+    print_row("HTTP", http_latencies, http_connections)
+    print_row("WebSocket", ws_latencies, ws_connections)
+    print(f"\nWebSocket connect + authenticate: {connect_seconds * 1000:.2f} ms (once per session)")
+    command_latencies.sort()
+    print(f"Server command delivery: p50 {percentile(command_latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(command_latencies, 0.99) * 1000:.2f} ms over {len(command_latencies)} commands")
+    speedup = statistics.mean(http_latencies) / statistics.mean(ws_latencies)
+    print(f"Mean per-event latency is {speedup:.1f}x lower over the event channel")
+
+    api.clear_auth_token()
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Fleet-scale load generator that replays the desktop client's traffic pattern.
+
+Each simulated client drives its own APIService, so requests go through the same
+code path as the real application (headers, retries, 401 -> token refresh):
+- auth/login and the config/policy fetch that follows it; the fetched policy
+  is applied to that client, so server-pushed throttles show up in the load
+- timer/start, then timer/update heartbeats and synthetic screenshot uploads
+  scheduled by SchedulePolicy (configured from utils.config, as in the app)
+- occasional timer/pause / timer/resume
+- timer/end
+
+Timer events use the WebSocket event channel when EVENT_CHANNEL_URL is set
+(the stand-in server supports it), falling back to HTTP like the app does.
+
+Simulated time can run faster than wall-clock time with --speed.
+
+Usage:
+    # Entirely offline, against the bundled stand-in server
+    python -m tools.load_generator --local --clients 200 --minutes 10 --speed 20
+
+    # Against a real deployment
+    python -m tools.load_generator --base-url https://staging.example.com/api --clients 50
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from api.api_service import APIService
+from tools.stub_server import StubServer
+from utils.config import get_config
+from utils.scheduling import SchedulePolicy
+
+
+def make_png(width: int, height: int, seed: int = 0) -> bytes:
+    """Build a grayscale PNG of random noise; noise keeps the compressed size close to width * height"""
+    rng = random.Random(seed)
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+    rows = b"".join(b"\x00" + rng.randbytes(width) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b""))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe collection of per-endpoint latencies and failures"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.failures[endpoint] += 1
+
+    def report(self, wall_seconds: float) -> None:
+        with self.lock:
+            endpoints = sorted(self.latencies)
+            all_latencies = sorted(value for endpoint in endpoints for value in self.latencies[endpoint])
+            total_failures = sum(self.failures.values())
+
+        print(f"\n{'endpoint':<22}{'count':>8}{'errors':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        rows = [(endpoint, sorted(self.latencies[endpoint]), self.failures[endpoint]) for endpoint in endpoints]
+        rows.append(("all", all_latencies, total_failures))
+        for endpoint, values, failures in rows:
+            print(f"{endpoint:<22}{len(values):>8}{failures:>8}"
+                  f"{percentile(values, 0.50) * 1000:>9.1f}{percentile(values, 0.90) * 1000:>9.1f}"
+                  f"{percentile(values, 0.99) * 1000:>9.1f}{(values[-1] if values else 0) * 1000:>9.1f}")
+
+        throughput = len(all_latencies) / wall_seconds if wall_seconds else 0
+        print(f"\n{len(all_latencies)} requests in {wall_seconds:.1f}s wall time: {throughput:.1f} req/s")
+
+
+class SimulatedClient:
+    """One desktop client: logs in, runs a timer session and uploads screenshots"""
+
+    def __init__(self, index: int, base_url: str, recorder: LatencyRecorder, policy: SchedulePolicy,
+                 screenshot: bytes, minutes: float, speed: float, pause_probability: float,
+                 stop_event: threading.Event):
+        self.index = index
+        self.recorder = recorder
+        self.policy = policy
+        self.screenshot = screenshot
+        self.duration = minutes * 60
+        self.speed = speed
+        self.pause_probability = pause_probability
+        self.stop_event = stop_event
+        self.rng = random.Random(index)
+
+        self.api = APIService()
+        self.api.base_url = base_url
+        self.api.set_token_refresh_callback(self.refresh_token_callback)
+        self.user_data = None
+
+    def _sleep(self, simulated_seconds: float) -> bool:
+        """Sleep for a span of simulated time; returns False if the run was interrupted"""
+        if simulated_seconds > 0:
+            self.stop_event.wait(simulated_seconds / self.speed)
+        return not self.stop_event.is_set()
+
+    def _timed_post(self, endpoint: str, data: Optional[Dict] = None,
+                    files: Optional[Dict] = None) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        response = self.api.post(endpoint, data=data, files=files)
+        self.recorder.record(endpoint, time.perf_counter() - started, response is not None)
+        return response
+
+    def _timed_event(self, endpoint: str) -> None:
+        """Timer event through APIService.send_event, as the dashboard sends them"""
+        over_channel = self.api.channel is not None and self.api.channel.is_connected
+        started = time.perf_counter()
+        reply = self.api.send_event(endpoint, {})
+        label = f"{endpoint} (ws)" if over_channel else endpoint
+        self.recorder.record(label, time.perf_counter() - started, reply is not None)
+
+    def refresh_token_callback(self, refresh_token: str) -> Tuple[Optional[str], Optional[str]]:
+        """Same exchange as DashboardWindow.refresh_token_callback, without the UI"""
+        started = time.perf_counter()
+        try:
+            response = requests.post(f"{self.api.base_url}/auth/refresh-token",
+                                     json={"refreshToken": refresh_token},
+                                     timeout=self.api.request_timeout)
+            ok = response.status_code == 200
+            if ok:
+                data = response.json()
+                return data['data']["accessToken"], data['data']["refreshToken"]
+            return None, None
+        except requests.exceptions.RequestException:
+            ok = False
+            return None, None
+        finally:
+            self.recorder.record("auth/refresh-token", time.perf_counter() - started, ok)
+
+    def login(self) -> bool:
+        started = time.perf_counter()
+        response = self.api.post("auth/login", {
+            "email": f"loadtest-{self.index}@example.com",
+            "password": "loadtest",
+        })
+        try:
+            data = response.json() if response is not None else {}
+            if not data.get("success"):
+                raise ValueError("login was not successful")
+            self.user_data = {
+                "user": data["data"]["user"],
+                "token": data["data"]["accessToken"],
+                "refresh_token": data["data"]["refreshToken"],
+            }
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Unexpected response (not JSON, another shape, or a failed login) counts as an error
+            self.recorder.record("auth/login", time.perf_counter() - started, False)
+            return False
+        self.recorder.record("auth/login", time.perf_counter() - started, True)
+        self.api.set_auth_token(self.user_data["token"], self.user_data["refresh_token"], self.user_data)
+
+        # A fresh client has no cached policy, so it fetches one right after login
+        endpoint = self.api.config.get("policy_endpoint")
+        if endpoint:
+            started = time.perf_counter()
+            response = self.api.get(endpoint)
+            self.recorder.record(endpoint, time.perf_counter() - started, response is not None)
+            if response is not None:
+                self.apply_policy(response)
+        return True
+
+    def apply_policy(self, response: requests.Response) -> None:
+        """Apply a fetched policy to this client only; the shared config and its disk cache are untouched"""
+        config = self.api.config
+        settings = config.parse_policy_response(response)
+        if settings is None:
+            return
+        values = config.merged(settings)
+        self.policy.configure(values)
+        self.api.request_timeout = values["request_timeout"]
+        self.api.max_retries = values["max_retries"]
+
+    def upload_screenshot(self) -> None:
+        files = {'screenshot': (f"screenshot_{self.index}.png", self.screenshot, "image/png")}
+        data = {
+            'timestamp': time.time(),
+            'user_id': self.user_data.get('user', {}).get('id', ''),
+            'auto_generated': True
+        }
+        self._timed_post('screenshot/upload', data=data, files=files)
+
+    def run(self) -> None:
+        if not self.login():
+            return
+        self._timed_event('timer/start')
+
+        # Mirrors DashboardWindow: heartbeats count elapsed (unpaused) seconds and
+        # the screenshot deadline is frozen while the session is paused
+        elapsed = 0.0
+        next_heartbeat = self.policy.first_heartbeat_delay()
+        next_screenshot = self.policy.first_screenshot_delay()
+
+        while elapsed < self.duration:
+            target = min(next_heartbeat, next_screenshot, self.duration)
+            if not self._sleep(target - elapsed):
+                break
+            elapsed = target
+
+            if next_screenshot <= elapsed:
+                next_screenshot = elapsed + self.policy.next_screenshot_delay()
+                if self.policy.should_capture():
+                    self.upload_screenshot()
+
+            if next_heartbeat <= elapsed:
+                self._timed_event('timer/update')
+                next_heartbeat = elapsed + self.policy.next_heartbeat_delay()
+
+                if self.rng.random() < self.pause_probability:
+                    self._timed_event('timer/pause')
+                    if not self._sleep(self.rng.uniform(30, 300)):
+                        break
+                    self._timed_event('timer/resume')
+
+        self._timed_event('timer/end')
+        self.api.disconnect_event_channel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay desktop client traffic from many simulated clients")
+    parser.add_argument("--base-url", default=os.getenv('API_URL'),
+                        help="API base URL (default: $API_URL)")
+    parser.add_argument("--local", action="store_true",
+                        help="Start the bundled stand-in server and run against it")
+    parser.add_argument("--token-ttl", type=float, default=60,
+                        help="Access token lifetime for --local, in wall seconds (default: 60)")
+    parser.add_argument("--policy-file",
+                        help="JSON settings the --local server pushes from config/policy")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--minutes", type=float, default=10,
+                        help="Simulated session length per client (default: 10)")
+    parser.add_argument("--speed", type=float, default=10,
+                        help="Simulated seconds per wall-clock second (default: 10)")
+    parser.add_argument("--start-spread", type=float, default=1.0,
+                        help="Wall seconds over which clients press Start (default: 1)")
+    parser.add_argument("--pause-probability", type=float, default=0.02,
+                        help="Chance of a pause after each heartbeat (default: 0.02)")
+    parser.add_argument("--screenshot-size", default="640x400",
+                        help="Synthetic screenshot dimensions, WIDTHxHEIGHT (default: 640x400)")
+    parser.add_argument("--verbose", action="store_true", help="Keep APIService info logging")
+    args = parser.parse_args()
+
+    server = None
+    if args.local:
+        policy = None
+        if args.policy_file:
+            with open(args.policy_file, 'r') as file:
+                policy = json.load(file)
+        server = StubServer(("127.0.0.1", 0), args.token_ttl, policy)
+        server.start_in_background()
+        args.base_url = server.base_url
+    if not args.base_url:
+        parser.error("--base-url (or API_URL) is required unless --local is given")
+
+    width, height = (int(part) for part in args.screenshot_size.lower().split("x"))
+    screenshot = make_png(width, height)
+    print(f"Driving {args.clients} clients against {args.base_url} "
+          f"({args.minutes:g} simulated min at {args.speed:g}x, screenshot {len(screenshot) // 1024} KiB)")
+
+    recorder = LatencyRecorder()
+    stop_event = threading.Event()
+    config = get_config()
+    clients = []
+    for index in range(args.clients):
+        policy = SchedulePolicy(seed=index)
+        policy.configure(config)
+        clients.append(SimulatedClient(index, args.base_url, recorder, policy, screenshot, args.minutes,
+                                       args.speed, args.pause_probability, stop_event))
+
+    if not args.verbose:
+        logging.getLogger("api_service").setLevel(logging.WARNING)
+
+    threads = []
+    started = time.perf_counter()
+    try:
+        for client in clients:
+            thread = threading.Thread(target=client.run, name=f"client-{client.index}", daemon=True)
+            thread.start()
+            threads.append(thread)
+            if args.start_spread and args.clients > 1:
+                time.sleep(args.start_spread / args.clients)
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("\nInterrupted, ending sessions...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    wall_seconds = time.perf_counter() - started
+
+    recorder.report(wall_seconds)
+    if server is not None:
+        print(f"Stand-in server saw: {dict(server.state.counts)}")
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
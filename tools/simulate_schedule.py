@@ -0,0 +1,122 @@
+"""
+Simulate the server-side arrival rate of screenshot uploads and timer heartbeats
+for a fleet of clients that all press Start at (roughly) the same time.
+
+Compares the old fixed schedule (screenshot at start and every 3 minutes, heartbeat
+on every 60th second of elapsed time) against SchedulePolicy.
+
+Usage:
+    python -m tools.simulate_schedule --clients 5000 --minutes 30
+"""
+import argparse
+import random
+from collections import Counter
+from typing import Dict, List
+
+from utils.scheduling import SchedulePolicy
+
+
+def simulate_fixed(start_times: List[float], duration: float,
+                   screenshot_interval: float, heartbeat_interval: float) -> Dict[str, Counter]:
+    """Arrivals per second for the fixed, synchronized schedule"""
+    screenshots, heartbeats = Counter(), Counter()
+    for start in start_times:
+        t = start
+        while t < duration:
+            screenshots[int(t)] += 1
+            t += screenshot_interval
+        t = start + heartbeat_interval
+        while t < duration:
+            heartbeats[int(t)] += 1
+            t += heartbeat_interval
+    return {"screenshot": screenshots, "heartbeat": heartbeats}
+
+
+def simulate_jittered(start_times: List[float], duration: float, policy_args: Dict,
+                      seed: int) -> Dict[str, Counter]:
+    """Arrivals per second when every client runs its own SchedulePolicy"""
+    screenshots, heartbeats = Counter(), Counter()
+    for index, start in enumerate(start_times):
+        policy = SchedulePolicy(seed=seed + index, **policy_args)
+
+        t = start + policy.first_screenshot_delay()
+        while t < duration:
+            if policy.should_capture():
+                screenshots[int(t)] += 1
+            t += policy.next_screenshot_delay()
+
+        # Heartbeats are counted in whole seconds of elapsed time, as in update_timer
+        elapsed = policy.first_heartbeat_delay()
+        while start + elapsed < duration:
+            heartbeats[int(start + elapsed)] += 1
+            elapsed += policy.next_heartbeat_delay()
+    return {"screenshot": screenshots, "heartbeat": heartbeats}
+
+
+def summarize(arrivals: Counter, duration: int) -> Dict[str, float]:
+    per_second = sorted(arrivals.get(second, 0) for second in range(duration))
+    total = sum(per_second)
+    return {
+        "total": total,
+        "mean": total / duration,
+        "p99": per_second[int(0.99 * (duration - 1))],
+        "peak": per_second[-1],
+    }
+
+
+def print_timeline(arrivals: Counter, duration: int, bucket: int, width: int = 50) -> None:
+    """Print an ASCII histogram of arrivals per `bucket` seconds"""
+    buckets = [sum(arrivals.get(s, 0) for s in range(b, min(b + bucket, duration)))
+               for b in range(0, duration, bucket)]
+    top = max(buckets) or 1
+    for index, count in enumerate(buckets):
+        bar = "#" * round(width * count / top)
+        print(f"  {index * bucket:>6}s {count:>7} {bar}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--start-spread", type=float, default=2.0,
+                        help="Seconds over which users press Start (default: 2)")
+    parser.add_argument("--screenshot-interval", type=float, default=180)
+    parser.add_argument("--heartbeat-interval", type=float, default=60)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--initial-delay-max", type=float, default=60 * 60,
+                        help="Cap on the first screenshot offset, which spans one interval (default: 3600)")
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    parser.add_argument("--bucket", type=int, default=30,
+                        help="Histogram bucket size in seconds (default: 30)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    duration = args.minutes * 60
+    rng = random.Random(args.seed)
+    start_times = [rng.uniform(0, args.start_spread) for _ in range(args.clients)]
+
+    fixed = simulate_fixed(start_times, duration, args.screenshot_interval, args.heartbeat_interval)
+    jittered = simulate_jittered(start_times, duration, {
+        "screenshot_interval": args.screenshot_interval,
+        "heartbeat_interval": args.heartbeat_interval,
+        "jitter": args.jitter,
+        "initial_delay_max": args.initial_delay_max,
+        "sample_rate": args.sample_rate,
+    }, args.seed)
+
+    print(f"{args.clients} clients, {args.minutes} min, Start pressed within {args.start_spread:g}s\n")
+    print(f"{'stream':<12}{'schedule':<10}{'total':>9}{'mean/s':>9}{'p99/s':>8}{'peak/s':>8}{'peak/mean':>11}")
+    for stream in ("screenshot", "heartbeat"):
+        for name, result in (("fixed", fixed), ("jittered", jittered)):
+            stats = summarize(result[stream], duration)
+            ratio = stats["peak"] / stats["mean"] if stats["mean"] else 0
+            print(f"{stream:<12}{name:<10}{stats['total']:>9}{stats['mean']:>9.1f}"
+                  f"{stats['p99']:>8}{stats['peak']:>8}{ratio:>11.1f}")
+
+    for name, result in (("fixed", fixed), ("jittered", jittered)):
+        print(f"\nScreenshot uploads per {args.bucket}s ({name}):")
+        print_timeline(result["screenshot"], duration, args.bucket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Local stand-in for the time tracker backend.
+
+Implements just enough of the API for the desktop client and the load tools
+to run offline:
+- POST auth/login, auth/refresh-token
+- POST timer/start, timer/pause, timer/resume, timer/update, timer/end
+- POST screenshot/upload (multipart body is read and discarded)
+- GET config/policy (settings from --policy-file, see utils.config)
+- GET events: WebSocket event channel (see api.event_channel) that acks timer
+  events and can push commands to connected clients
+
+Access tokens expire after --token-ttl seconds so the 401 -> refresh path is
+exercised.
+
+Usage:
+    python -m tools.stub_server --port 8000
+    # then set API_URL=http://127.0.0.1:8000
+"""
+import argparse
+import json
+import secrets
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from api.event_channel import (OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, accept_key,
+                               encode_frame, read_message)
+
+TIMER_ENDPOINTS = {"timer/start", "timer/pause", "timer/resume", "timer/update", "timer/end"}
+
+
+class StubState:
+    """Token store and request counters shared by all handler threads"""
+
+    def __init__(self, token_ttl: float = 300):
+        self.token_ttl = token_ttl
+        self.lock = threading.Lock()
+        self.access_tokens: Dict[str, float] = {}  # token -> expiry (monotonic)
+        self.refresh_tokens: Dict[str, str] = {}  # refresh token -> user email
+        self.counts: Counter = Counter()
+        self.event_ids = set()
+
+    def issue_tokens(self, email: str) -> Tuple[str, str]:
+        access_token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        with self.lock:
+            self.access_tokens[access_token] = time.monotonic() + self.token_ttl
+            self.refresh_tokens[refresh_token] = email
+        return access_token, refresh_token
+
+    def rotate(self, refresh_token: str) -> Optional[Tuple[str, Tuple[str, str]]]:
+        """Exchange a refresh token for a new token pair; returns (email, tokens)"""
+        with self.lock:
+            email = self.refresh_tokens.pop(refresh_token, None)
+        if email is None:
+            return None
+        return email, self.issue_tokens(email)
+
+    def is_valid(self, access_token: Optional[str]) -> bool:
+        with self.lock:
+            expiry = self.access_tokens.get(access_token)
+            if expiry is not None and expiry < time.monotonic():
+                del self.access_tokens[access_token]
+                expiry = None
+        return expiry is not None
+
+    def is_duplicate(self, event_id: Optional[str]) -> bool:
+        """Remember an event id; True if it was already seen (e.g. resent over HTTP after a lost ack)"""
+        if not event_id:
+            return False
+        with self.lock:
+            if event_id in self.event_ids:
+                self.counts["duplicate events"] += 1
+                return True
+            self.event_ids.add(event_id)
+        return False
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Access logging would dominate the output under load
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self._read_body() or b"{}")
+        except ValueError:
+            return {}
+
+    def _bearer_token(self) -> Optional[str]:
+        header = self.headers.get("Authorization", "")
+        return header[len("Bearer "):] if header.startswith("Bearer ") else None
+
+    def _endpoint(self) -> str:
+        # Match on the trailing path so any base URL prefix (e.g. /api/v1) works
+        path = self.path.split("?", 1)[0].strip("/")
+        for endpoint in TIMER_ENDPOINTS | {"auth/login", "auth/refresh-token", "screenshot/upload",
+                                           "config/policy", "events"}:
+            if path == endpoint or path.endswith("/" + endpoint):
+                return endpoint
+        return path
+
+    def _tokens_payload(self, email: str, tokens: Tuple[str, str]) -> Dict[str, Any]:
+        access_token, refresh_token = tokens
+        return {
+            "success": True,
+            "data": {
+                "user": {"id": email, "email": email, "firstName": email.split("@")[0]},
+                "accessToken": access_token,
+                "refreshToken": refresh_token,
+            },
+        }
+
+    def do_GET(self) -> None:
+        state = self.server.state
+        endpoint = self._endpoint()
+        state.count(endpoint)
+
+        if endpoint == "events" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self._serve_websocket()
+            return
+
+        if endpoint == "config/policy":
+            if not state.is_valid(self._bearer_token()):
+                state.count("401")
+                self._send_json(401, {"success": False, "message": "Token expired"})
+                return
+            self._send_json(200, {"success": True, "data": self.server.policy})
+            return
+
+        self._send_json(404, {"success": False, "message": f"Unknown endpoint: {endpoint}"})
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        with self.send_lock:
+            self.wfile.write(encode_frame(opcode, payload, mask=False))
+            self.wfile.flush()
+
+    def send_message(self, message: Dict[str, Any]) -> None:
+        self._send_frame(OP_TEXT, json.dumps(message).encode())
+
+    def _serve_websocket(self) -> None:
+        state = self.server.state
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        self.send_lock = threading.Lock()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        token = None
+        self.server.add_socket(self)
+        try:
+            while True:
+                opcode, payload = read_message(self.rfile)
+                if opcode == OP_CLOSE:
+                    self._send_frame(OP_CLOSE, payload[:2])
+                    return
+                if opcode == OP_PING:
+                    self._send_frame(OP_PONG, payload)
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+
+                message = json.loads(payload)
+                if message.get("type") == "auth":
+                    token = message.get("token")
+                    valid = state.is_valid(token)
+                    self.send_message({"type": "auth_ok" if valid else "auth_error"})
+                elif message.get("type") == "event":
+                    event = message.get("event", "")
+                    state.count(f"ws:{event}")
+                    if not state.is_valid(token):
+                        state.count("401")
+                        self.send_message({"type": "error", "id": message.get("id"), "code": 401})
+                    else:
+                        # A duplicate is acknowledged again but not applied twice
+                        state.is_duplicate(message.get("id"))
+                        self.send_message({"type": "ack", "id": message.get("id")})
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.server.remove_socket(self)
+
+    def do_POST(self) -> None:
+        state = self.server.state
+        endpoint = self._endpoint()
+        state.count(endpoint)
+
+        if endpoint == "auth/login":
+            data = self._read_json()
+            email = data.get("email")
+            if not email or not data.get("password"):
+                self._send_json(400, {"success": False, "message": "Email and password are required"})
+                return
+            self._send_json(200, self._tokens_payload(email, state.issue_tokens(email)))
+            return
+
+        if endpoint == "auth/refresh-token":
+            rotated = state.rotate(self._read_json().get("refreshToken", ""))
+            if rotated is None:
+                self._send_json(401, {"success": False, "message": "Invalid refresh token"})
+                return
+            self._send_json(200, self._tokens_payload(*rotated))
+            return
+
+        if endpoint in TIMER_ENDPOINTS or endpoint == "screenshot/upload":
+            # Drain the body before answering so keep-alive connections stay in sync
+            self._read_body()
+            if not state.is_valid(self._bearer_token()):
+                state.count("401")
+                self._send_json(401, {"success": False, "message": "Token expired"})
+                return
+            if endpoint in TIMER_ENDPOINTS:
+                state.is_duplicate(self.headers.get("Idempotency-Key"))
+            self._send_json(200, {"success": True})
+            return
+
+        self._read_body()
+        self._send_json(404, {"success": False, "message": f"Unknown endpoint: {endpoint}"})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Fleet simulations open many connections at once
+
+    def __init__(self, address: Tuple[str, int], token_ttl: float = 300,
+                 policy: Optional[Dict[str, Any]] = None):
+        super().__init__(address, StubRequestHandler)
+        self.state = StubState(token_ttl)
+        self.policy = policy or {}
+        self.sockets = set()
+        self.sockets_lock = threading.Lock()
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        # Every accepted TCP connection, to compare per-request HTTP with the event channel
+        self.state.count("connections")
+        super().process_request(request, client_address)
+
+    def add_socket(self, handler: StubRequestHandler) -> None:
+        with self.sockets_lock:
+            self.sockets.add(handler)
+
+    def remove_socket(self, handler: StubRequestHandler) -> None:
+        with self.sockets_lock:
+            self.sockets.discard(handler)
+
+    def push_command(self, command: str, **data: Any) -> int:
+        """Send a command to every connected event channel; returns how many received it"""
+        with self.sockets_lock:
+            handlers = list(self.sockets)
+        delivered = 0
+        for handler in handlers:
+            try:
+                handler.send_message({"type": "command", "command": command, **data})
+                delivered += 1
+            except OSError:
+                self.remove_socket(handler)
+        return delivered
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="stub-server", daemon=True)
+        thread.start()
+        return thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the time tracker API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--token-ttl", type=float, default=300,
+                        help="Access token lifetime in seconds (default: 300)")
+    parser.add_argument("--policy-file",
+                        help="JSON file of settings served from config/policy (default: none)")
+    args = parser.parse_args()
+
+    policy = None
+    if args.policy_file:
+        with open(args.policy_file, 'r') as file:
+            policy = json.load(file)
+
+    server = StubServer((args.host, args.port), args.token_ttl, policy)
+    print(f"Stub API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requests served: {dict(server.state.counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,30 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QLineEdit, QPushButton,
                              QStackedWidget, QMessageBox, QGridLayout, QFrame,
                              QCheckBox)
-from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QScreen
 import requests
 import os
 import time
+import math
+import threading
 from datetime import timedelta
 from api.api_service import APIService
+from utils.config import get_config, get_config_dir
+from utils.scheduling import SchedulePolicy
+from utils.capture_history import CaptureHistory, STATUS_PENDING, STATUS_UPLOADED, STATUS_FAILED, STATUS_LOCAL
+from utils.thumbnail_cache import ThumbnailCache
+from utils.session_store import SessionStore
+from ui.screenshot_history import ScreenshotHistoryModel, ScreenshotHistoryView
 from dotenv import load_dotenv
 load_dotenv()
 class DashboardWindow(QWidget):
+    # Commands pushed by the server arrive on the event channel thread; this signal
+    # hands them to the UI thread
+    server_command = pyqtSignal(dict)
+    # Result of validating a restored session's refresh token in the background
+    session_validated = pyqtSignal(dict)
+    
     def __init__(self, stacked_widget):
         super().__init__()
         self.stacked_widget = stacked_widget
@@ -26,15 +40,45 @@ class DashboardWindow(QWidget):
         self.is_running = False
         self.is_paused = False
         
+        # Settings can change live when the server pushes a new policy
+        self.config = get_config()
+        self.config.subscribe(self.apply_config)
+        
+        # Remote policy is re-fetched on a slow TTL while logged in
+        self.policy_timer = QTimer()
+        self.policy_timer.timeout.connect(self.refresh_remote_policy)
+        
+        # Jittered scheduling for screenshots and heartbeats
+        self.schedule = SchedulePolicy.from_config(self.config)
+        self.next_heartbeat_at = 0  # elapsed_time (seconds) of the next timer/update
+        
         # Screenshot timer variables
         self.screenshot_timer = QTimer()
-        self.screenshot_timer.timeout.connect(self.take_screenshot)
-        self.screenshot_interval = 3 * 60 * 1000  # 3 minutes in milliseconds
+        self.screenshot_timer.setSingleShot(True)  # Re-armed with a fresh jittered delay each time
+        self.screenshot_timer.timeout.connect(self.on_screenshot_timer)
+        self.next_screenshot_at = None  # time.monotonic() deadline of the pending screenshot
+        self.screenshot_remaining = None  # Seconds left on the pending screenshot when paused
         self.auto_screenshot_enabled = False
         
+        # Today's captures (per user, see switch_capture_history) and their thumbnails
+        self.capture_history = CaptureHistory(None)
+        self.history_user_id = None
+        self.thumbnail_cache = ThumbnailCache(os.path.join(get_config_dir(), "thumbnails"),
+                                              int(self.config.get("thumbnail_cache_mb") * 1024 * 1024))
+        self.history_model = ScreenshotHistoryModel(self.capture_history, self.thumbnail_cache, self)
+        
         self.api = APIService()
         # Register the token refresh callback
         self.api.set_token_refresh_callback(self.refresh_token_callback)
+        # Route server commands from the event channel to handle_server_command
+        self.server_command.connect(self.handle_server_command)
+        self.api.set_command_callback(self.server_command.emit)
+        
+        # Refresh token, profile and running timer persisted for the next launch
+        self.session_store = SessionStore(get_config_dir())
+        self.pending_timer_state = None  # Timer to restore once a restored session is validated
+        self.logging_out = False  # Set while logout() runs so its requests cannot trigger another logout
+        self.session_validated.connect(self.on_session_validated)
 
         self.setup_ui()
         
@@ -157,7 +201,7 @@ class DashboardWindow(QWidget):
         screenshot_control_layout.addWidget(self.screenshot_button)
         
         # Auto screenshot toggle
-        self.auto_screenshot_checkbox = QCheckBox("Auto Screenshot (every 3 min)")
+        self.auto_screenshot_checkbox = QCheckBox(f"Auto Screenshot ({self.describe_screenshot_interval()})")
         self.auto_screenshot_checkbox.toggled.connect(self.toggle_auto_screenshot)
         screenshot_control_layout.addWidget(self.auto_screenshot_checkbox)
         
@@ -174,7 +218,20 @@ class DashboardWindow(QWidget):
         timer_layout.addLayout(screenshot_layout)
         
         content_layout.addWidget(timer_frame)
-        content_layout.addStretch()
+        
+        # Screenshot history section
+        history_frame = QFrame()
+        history_frame.setFrameShape(QFrame.StyledPanel)
+        history_layout = QVBoxLayout(history_frame)
+        
+        history_header = QLabel("Today's Screenshots")
+        history_header.setFont(QFont("Arial", 12, QFont.Bold))
+        history_layout.addWidget(history_header)
+        
+        self.history_view = ScreenshotHistoryView(self.history_model)
+        history_layout.addWidget(self.history_view)
+        
+        content_layout.addWidget(history_frame, 1)
         
         # Add content to main layout
         content_container = QFrame()
@@ -192,58 +249,309 @@ class DashboardWindow(QWidget):
         # Update the API service with the tokens
         self.api.set_auth_token(self.token, self.refresh_token, self.user_data)
         
-        user_info = data.get("user", {})
+        # Remember the session so the next launch can skip the login screen
+        self.session_store.save_login(self.refresh_token, data.get("user", {}))
+        
+        self.show_user_info(data.get("user", {}))
+        self.switch_capture_history(data.get("user", {}))
+        
+        # Pick up the latest server policy now that requests can be authenticated
+        # (skipped when the cached policy is still within its TTL)
+        if self.config.seconds_until_refresh() > 0:
+            self.schedule_policy_refresh()
+        else:
+            self.refresh_remote_policy()
+    
+    def switch_capture_history(self, user_info):
+        """Show the capture history of the given user (or none after logout)"""
+        user_id = (user_info or {}).get("id")
+        if self.capture_history.log_path is not None and user_id == self.history_user_id:
+            return
+        self.history_user_id = user_id
+        self.capture_history = CaptureHistory.for_user(get_config_dir(), user_id)
+        self.history_model.set_history(self.capture_history)
+    
+    def show_user_info(self, user_info, status=None):
         first_name = user_info.get("firstName", "User")
         
         self.welcome_label.setText(f"Welcome, {first_name}!")
         
         # Update user info
         email = user_info.get("email", "N/A")
-        self.user_info_label.setText(f"Email: {email}")
+        self.user_info_label.setText(f"Email: {email}" + (f" ({status})" if status else ""))
+    
+    def restore_session(self, session):
+        """
+        Show the dashboard straight away from a saved session.
+        The refresh token is exchanged in the background; timer controls stay disabled
+        until that succeeds, and the app falls back to login only if the server rejects it.
+        """
+        self.user_data = {"user": session["user"], "token": None, "refresh_token": session["refresh_token"]}
+        self.refresh_token = session["refresh_token"]
+        self.pending_timer_state = session.get("timer")
+        
+        self.show_user_info(session["user"], "restoring session...")
+        self.switch_capture_history(session["user"])
+        self.start_button.setEnabled(False)
+        self.screenshot_button.setEnabled(False)
+        self.validate_session()
+    
+    def validate_session(self):
+        if not self.refresh_token or self.token:
+            return
+        thread = threading.Thread(target=self._validate_session_worker, args=(self.refresh_token,), daemon=True)
+        thread.start()
+    
+    def _validate_session_worker(self, refresh_token):
+        """Runs off the UI thread and reports back through session_validated"""
+        try:
+            response = self.request_token_refresh(refresh_token)
+        except requests.exceptions.RequestException as e:
+            self.session_validated.emit({"ok": False, "transient": True, "error": str(e)})
+            return
+        
+        if response.status_code == 200:
+            tokens = self.parse_token_response(response)
+            if tokens is None:
+                # Retried like an outage; a consumed refresh token gets rejected on the next try
+                self.session_validated.emit({"ok": False, "transient": True,
+                                             "error": "Malformed token refresh response"})
+            else:
+                self.session_validated.emit({"ok": True, "data": tokens})
+        else:
+            # Server errors and rate limiting are worth retrying; anything else means the token was rejected
+            transient = response.status_code >= 500 or response.status_code == 429
+            self.session_validated.emit({"ok": False, "transient": transient,
+                                         "error": f"Status code: {response.status_code}"})
+    
+    def on_session_validated(self, result):
+        if self.user_data is None or self.token:
+            return  # Logged out (or logged in again) while validation was in flight
+        
+        if result["ok"]:
+            tokens = result["data"]
+            self.set_user_data({
+                "user": tokens["user"] or self.user_data["user"],
+                "token": tokens["token"],
+                "refresh_token": tokens["refresh_token"],
+            })
+            self.start_button.setEnabled(not (self.is_running or self.is_paused))
+            self.screenshot_button.setEnabled(True)
+            self.restore_timer_state(self.pending_timer_state)
+            self.pending_timer_state = None
+        elif result.get("transient"):
+            print(f"Could not validate saved session, retrying: {result.get('error')}")
+            self.show_user_info(self.user_data["user"], "offline, retrying...")
+            QTimer.singleShot(15 * 1000, self.validate_session)
+        else:
+            print(f"Saved session rejected: {result.get('error')}")
+            self.session_store.clear()
+            self.user_data = None
+            self.refresh_token = None
+            self.pending_timer_state = None
+            self.start_button.setEnabled(True)
+            self.screenshot_button.setEnabled(True)
+            QMessageBox.warning(self, "Session Expired", "Your session has expired. Please log in again.")
+            self.stacked_widget.setCurrentIndex(0)  # Switch to login page
+    
+    def timer_state(self):
+        """Snapshot of the timer session for persistence, or None if no session is active"""
+        if not (self.is_running or self.is_paused) or not self.user_data:
+            return None
+        return {
+            "user_id": self.user_data.get("user", {}).get("id"),
+            "elapsed_time": self.elapsed_time,
+            "is_paused": self.is_paused,
+            "auto_screenshot": self.auto_screenshot_enabled,
+        }
+    
+    def save_timer_state(self, server_paused=False):
+        """
+        Checkpoint the timer session.
+        server_paused records that a running timer was also paused on the server, so a
+        restore knows whether the session kept running there while the app was closed.
+        """
+        if self.pending_timer_state is not None:
+            return  # Restore hasn't happened yet; keep the saved session as it was
+        state = self.timer_state()
+        if state is not None:
+            state["server_paused"] = server_paused
+        self.session_store.save_timer(state)
+    
+    def shutdown(self):
+        """Checkpoint the timer and pause it on the server (best effort) before the app closes"""
+        server_paused = False
+        if self.is_running and self.pending_timer_state is None:
+            server_paused = self.api.send_event('timer/pause', {}, retry=False) is not None
+        self.save_timer_state(server_paused)
+        self.api.disconnect_event_channel()
+    
+    def restore_timer_state(self, state):
+        """Resume a timer session saved at shutdown if it is still valid"""
+        if not state:
+            return
+        
+        user_id = self.user_data.get("user", {}).get("id")
+        age = time.time() - state.get("saved_at", 0)
+        if state.get("user_id") != user_id or age > self.config.get("timer_restore_max_gap"):
+            # Too old to continue; close it on the server instead of leaving it open
+            print("Saved timer session is no longer valid, ending it")
+            self.api.send_event('timer/end', {})
+            self.session_store.save_timer(None)
+            return
+        
+        # Time while the app was closed is not counted
+        self.elapsed_time = int(state.get("elapsed_time", 0))
+        self.timer_display.setText(str(timedelta(seconds=self.elapsed_time)))
+        self.next_heartbeat_at = self.elapsed_time + self.schedule.first_heartbeat_delay()
+        self.start_button.setEnabled(False)
+        self.pause_button.setEnabled(True)
+        self.end_button.setEnabled(True)
+        
+        if state.get("is_paused"):
+            self.is_paused = True
+            self.is_running = False
+            self.pause_button.setText("Resume")
+        else:
+            self.is_running = True
+            self.is_paused = False
+            self.timer.start(1000)
+        
+        if state.get("auto_screenshot") and not self.auto_screenshot_enabled:
+            self.auto_screenshot_checkbox.setChecked(True)
+            # toggle_auto_screenshot schedules the next screenshot if the timer is running
+        
+        if self.is_running:
+            if not state.get("server_paused"):
+                # The app exited without pausing (e.g. it crashed), so the server
+                # session kept running; pause it as of the last checkpoint before resuming
+                self.api.send_event('timer/pause', {"paused_at": state.get("saved_at")})
+            self.api.send_event('timer/resume', {})
+        print(f"Restored timer session at {timedelta(seconds=self.elapsed_time)}")
+    
+    def refresh_remote_policy(self):
+        """Fetch the server-pushed tuning policy; cached settings stay in effect on failure"""
+        if not self.token:
+            return
+        self.config.fetch_remote(self.api)
+        self.schedule_policy_refresh()
+    
+    def schedule_policy_refresh(self):
+        """Arm the policy timer for when the cached policy expires (a full TTL after a failed fetch)"""
+        delay = self.config.seconds_until_refresh() or self.config.get("policy_ttl")
+        self.policy_timer.start(SchedulePolicy.to_ms(delay))
+    
+    def apply_config(self, changes):
+        """Apply settings changed by a new remote policy to the running session"""
+        schedule_keys = {"screenshot_interval", "heartbeat_interval", "schedule_jitter",
+                         "screenshot_initial_delay_max", "screenshot_sample_rate"}
+        if schedule_keys & changes.keys():
+            self.schedule.configure(self.config)
+            
+            # Pull pending events in if the new schedule is tighter; a looser one
+            # takes effect from the next event so nothing is skipped
+            if self.screenshot_timer.isActive():
+                self.schedule_screenshot(min(self.seconds_until_screenshot(),
+                                             self.schedule.next_screenshot_delay()))
+            elif self.screenshot_remaining is not None:
+                self.screenshot_remaining = min(self.screenshot_remaining,
+                                                self.schedule.next_screenshot_delay())
+            if self.is_running or self.is_paused:
+                self.next_heartbeat_at = min(self.next_heartbeat_at,
+                                             self.elapsed_time + self.schedule.next_heartbeat_delay())
+            
+            self.auto_screenshot_checkbox.setText(f"Auto Screenshot ({self.describe_screenshot_interval()})")
+            if self.auto_screenshot_enabled:
+                self.screenshot_status_label.setText(
+                    f"Automatic screenshots: Enabled ({self.describe_screenshot_interval()})")
+        
+        if "thumbnail_cache_mb" in changes:
+            self.thumbnail_cache.set_max_bytes(int(changes["thumbnail_cache_mb"] * 1024 * 1024))
+        
+        if "policy_ttl" in changes and self.policy_timer.isActive():
+            self.schedule_policy_refresh()
     
     def refresh_token_callback(self, refresh_token):
         """
         Callback function for the APIService to refresh the token when it expires.
         Returns a tuple of (new_access_token, new_refresh_token)
+        
+        Only a rejected refresh token logs the user out; network errors, server
+        errors and malformed responses keep the session so a later request retries.
         """
+        if self.logging_out:
+            return None, None  # The session is being torn down; let the request fail
+        
         try:
-            # URL for token refresh
-            auth_url = f"{os.getenv('API_URL')}/auth/refresh-token" # Replace with your actual auth endpoint
-            
             # Send the refresh token to get a new access token
-            response = requests.post(
-                auth_url,
-                json={"refreshToken": refresh_token}
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                new_token = data['data']["accessToken"]
-                new_refresh_token = data['data']["refreshToken"]
-                
-                # Update local tokens
-                self.token = new_token
-                self.refresh_token = new_refresh_token
-                
-                # Update user data if provided in the response
-                if "user" in data:
-                    self.user_data["user"] = data["user"]
-                    
-                print("Token refreshed successfully")
-                return new_token, new_refresh_token
-            else:
-                print(f"Failed to refresh token. Status code: {response.status_code}")
-                # If refresh fails, user might need to log in again
-                self.handle_auth_failure()
-                return None, None
-                
-        except Exception as e:
-            print(f"Error refreshing token: {str(e)}")
+            response = self.request_token_refresh(refresh_token)
+        except requests.exceptions.RequestException as e:
+            print(f"Could not reach the server to refresh the token: {str(e)}")
+            return None, None
+        
+        if response.status_code >= 500 or response.status_code == 429:
+            print(f"Server unavailable while refreshing token. Status code: {response.status_code}")
+            return None, None
+        
+        if response.status_code != 200:
+            print(f"Failed to refresh token. Status code: {response.status_code}")
+            # The refresh token was rejected, the user needs to log in again
             self.handle_auth_failure()
             return None, None
+        
+        tokens = self.parse_token_response(response)
+        if tokens is None:
+            print("Failed to refresh token: malformed response")
+            return None, None
+        
+        # Update local tokens
+        self.token = tokens["token"]
+        self.refresh_token = tokens["refresh_token"]
+        
+        # Update user data if provided in the response
+        if tokens["user"]:
+            self.user_data["user"] = tokens["user"]
+        
+        # Refresh tokens rotate; keep the persisted one current
+        self.session_store.save_login(self.refresh_token, self.user_data.get("user", {}))
+        
+        print("Token refreshed successfully")
+        return self.token, self.refresh_token
+    
+    def request_token_refresh(self, refresh_token):
+        """POST the refresh token to the auth endpoint and return the raw response"""
+        # URL for token refresh
+        auth_url = f"{os.getenv('API_URL')}/auth/refresh-token" # Replace with your actual auth endpoint
+        return requests.post(auth_url, json={"refreshToken": refresh_token},
+                             timeout=self.api.request_timeout)
+    
+    def parse_token_response(self, response):
+        """
+        Tokens from a successful refresh-token response
+        
+        Returns:
+            Dict with "token", "refresh_token" and "user" (None if not sent),
+            or None if the response body is malformed
+        """
+        try:
+            data = response.json()
+            payload = data['data']
+            tokens = {
+                "token": payload["accessToken"],
+                "refresh_token": payload["refreshToken"],
+                "user": data.get("user") or payload.get("user"),
+            }
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+        if not isinstance(tokens["token"], str) or not isinstance(tokens["refresh_token"], str):
+            return None
+        return tokens
     
     def handle_auth_failure(self):
         """Handle authentication failure by logging out and redirecting to login"""
+        if self.logging_out:
+            return
+        
         # Show message to user
         QMessageBox.warning(self, "Session Expired", 
                            "Your session has expired. Please log in again.")
@@ -259,16 +567,23 @@ class DashboardWindow(QWidget):
         self.pause_button.setEnabled(True)
         self.end_button.setEnabled(True)
         
+        # Offset the first heartbeat so clients started together don't report together
+        self.next_heartbeat_at = self.schedule.first_heartbeat_delay()
+        
         # Start automatic screenshots when timer starts
         if not self.auto_screenshot_enabled:
             self.auto_screenshot_checkbox.setChecked(True)
             # toggle_auto_screenshot will be called automatically due to the toggled signal
+        else:
+            self.schedule_screenshot(self.schedule.first_screenshot_delay())
         
         # Send initial timer start event to API
-        self.api.post('timer/start', {})
+        self.api.send_event('timer/start', {})
+        
+        # The initial screenshot fires after a random phase offset instead of immediately,
+        # so an office pressing Start together doesn't upload in one burst
         
-        # Take initial screenshot
-        self.take_screenshot()
+        self.save_timer_state()
     
     def pause_timer(self):
         if self.is_paused:
@@ -278,12 +593,17 @@ class DashboardWindow(QWidget):
             self.timer.start(1000)
             self.pause_button.setText("Pause")
             
-            # Resume automatic screenshots
+            # Resume automatic screenshots with whatever was left of the pending delay
             if self.auto_screenshot_enabled:
-                self.screenshot_timer.start(self.screenshot_interval)
+                remaining = self.screenshot_remaining
+                if remaining is None:
+                    remaining = self.schedule.first_screenshot_delay()
+                self.schedule_screenshot(remaining)
+                self.screenshot_remaining = None
                 
             # Send timer resume event to API
-            self.api.post('timer/resume', {})
+            self.api.send_event('timer/resume', {})
+            self.save_timer_state()
         else:
             # Pause timer
             self.is_paused = True
@@ -293,14 +613,16 @@ class DashboardWindow(QWidget):
             
             # Pause automatic screenshots
             if self.auto_screenshot_enabled:
-                self.screenshot_timer.stop()
+                self.screenshot_remaining = self.seconds_until_screenshot()
+                self.cancel_screenshot()
                 
             # Send timer pause event to API
-            self.api.post('timer/pause', {})
+            self.api.send_event('timer/pause', {})
+            self.save_timer_state()
     
     def end_timer(self):
         # Send final timer data before stopping
-        self.api.post('timer/end', {})
+        self.api.send_event('timer/end', {})
         
         self.is_running = False
         self.is_paused = False
@@ -317,7 +639,10 @@ class DashboardWindow(QWidget):
         
         # Reset timer
         self.elapsed_time = 0
+        self.next_heartbeat_at = 0
+        self.screenshot_remaining = None
         self.timer_display.setText("00:00:00")
+        self.save_timer_state()
         
     def update_timer(self):
         self.elapsed_time += 1
@@ -325,14 +650,45 @@ class DashboardWindow(QWidget):
         self.timer_display.setText(formatted_time)
         
         # Update next screenshot time if auto screenshots are enabled
-        if self.auto_screenshot_enabled:
-            remaining_time = self.screenshot_interval - (self.elapsed_time * 1000) % self.screenshot_interval
-            remaining_seconds = remaining_time // 1000
+        if self.auto_screenshot_enabled and self.next_screenshot_at is not None:
+            remaining_seconds = math.ceil(self.seconds_until_screenshot())
             self.next_screenshot_label.setText(f"Next screenshot in: {remaining_seconds} seconds")
         
-        # Send periodic updates to API (e.g., every minute)
-        if self.elapsed_time % 60 == 0:
-            self.api.post('timer/update', {})
+        # Send periodic updates to API on a jittered, per-client schedule (about once a minute)
+        if self.elapsed_time >= self.next_heartbeat_at:
+            self.api.send_event('timer/update', {})
+            self.next_heartbeat_at = self.elapsed_time + self.schedule.next_heartbeat_delay()
+            # Checkpoint so a crash loses at most one heartbeat interval
+            self.save_timer_state()
+    
+    def describe_screenshot_interval(self):
+        """Human readable description of the average screenshot interval"""
+        seconds = self.schedule.screenshot_interval
+        if seconds < 60:
+            return f"every ~{seconds:.0f} s"
+        return f"every ~{round(seconds / 60, 1):g} min"
+    
+    def schedule_screenshot(self, delay_seconds):
+        """Arm the single-shot screenshot timer and remember its deadline for the countdown"""
+        self.screenshot_timer.start(SchedulePolicy.to_ms(delay_seconds))
+        self.next_screenshot_at = time.monotonic() + delay_seconds
+    
+    def cancel_screenshot(self):
+        self.screenshot_timer.stop()
+        self.next_screenshot_at = None
+    
+    def seconds_until_screenshot(self):
+        if self.next_screenshot_at is None:
+            return 0
+        return max(0.0, self.next_screenshot_at - time.monotonic())
+    
+    def on_screenshot_timer(self):
+        # Re-arm first so a slow capture/upload doesn't shift the schedule
+        self.schedule_screenshot(self.schedule.next_screenshot_delay())
+        
+        # Randomized sampling may skip this slot entirely
+        if self.schedule.should_capture():
+            self.take_screenshot()
     
     def toggle_auto_screenshot(self, checked):
         self.auto_screenshot_enabled = checked
@@ -340,27 +696,56 @@ class DashboardWindow(QWidget):
         if checked:
             # Only start the screenshot timer if the main timer is running and not paused
             if self.is_running and not self.is_paused:
-                self.screenshot_timer.start(self.screenshot_interval)
-            self.screenshot_status_label.setText("Automatic screenshots: Enabled (every 3 minutes)")
+                self.schedule_screenshot(self.schedule.first_screenshot_delay())
+            self.screenshot_status_label.setText(
+                f"Automatic screenshots: Enabled ({self.describe_screenshot_interval()})")
             
             # Calculate time until next screenshot
-            remaining_time = self.screenshot_interval
-            remaining_seconds = remaining_time // 1000
-            self.next_screenshot_label.setText(f"Next screenshot in: {remaining_seconds} seconds")
+            if self.next_screenshot_at is not None:
+                remaining_seconds = math.ceil(self.seconds_until_screenshot())
+                self.next_screenshot_label.setText(f"Next screenshot in: {remaining_seconds} seconds")
         else:
             # Stop the screenshot timer
-            self.screenshot_timer.stop()
+            self.cancel_screenshot()
+            self.screenshot_remaining = None
             self.screenshot_status_label.setText("Automatic screenshots: Disabled")
             self.next_screenshot_label.setText("")
     
-    def take_screenshot(self):
+    def handle_server_command(self, message):
+        """Act on a command pushed by the server over the event channel"""
+        command = message.get("command")
+        print(f"Server command received: {command}")
+        
+        if command == "pause":
+            if self.is_running and not self.is_paused:
+                self.pause_timer()
+        elif command == "resume":
+            if self.is_paused:
+                self.pause_timer()
+        elif command == "end":
+            if self.is_running or self.is_paused:
+                self.end_timer()
+        elif command == "screenshot":
+            if self.token:
+                self.take_screenshot(auto_generated=True)
+        elif command == "refresh_policy":
+            self.refresh_remote_policy()
+        else:
+            print(f"Ignoring unknown server command: {command}")
+    
+    def take_screenshot(self, checked=False, auto_generated=None):
+        # Screenshots from the timer (or requested by the server) are automatic
+        if auto_generated is None:
+            auto_generated = self.sender() == self.screenshot_timer
+        
         # Get the primary screen
         screen = QApplication.primaryScreen()
         screenshot = screen.grabWindow(0)
         
         # Save screenshot to a temporary file
         timestamp = time.strftime("%Y%m%d-%H%M%S")
-        filename = f"screenshot_{timestamp}.png"
+        image_format = self.config.get("screenshot_format")
+        filename = f"screenshot_{timestamp}.{image_format.lower()}"
         home_dir = os.path.expanduser("~")
         save_path = os.path.join(home_dir, "Screenshots")
         
@@ -369,17 +754,31 @@ class DashboardWindow(QWidget):
             os.makedirs(save_path)
             
         full_path = os.path.join(save_path, filename)
-        screenshot.save(full_path, "PNG")
+        
+        # Capture size and quality are tunable through the config to reduce upload volume
+        scale = self.config.get("screenshot_scale")
+        if scale < 1:
+            screenshot = screenshot.scaled(int(screenshot.width() * scale), int(screenshot.height() * scale),
+                                           Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        screenshot.save(full_path, image_format, self.config.get("screenshot_quality"))
+        
+        # Record the capture so it shows up in the history view
+        entry = self.capture_history.record(full_path, auto_generated,
+                                            STATUS_PENDING if self.token else STATUS_LOCAL)
+        self.history_model.add_capture(entry)
         
         # Send to API if token is available
         if self.token:
-            self.send_screenshot_to_api(full_path)
+            self.send_screenshot_to_api(full_path, entry, auto_generated)
         
         # Only show message for manual screenshots
-        if not self.sender() == self.screenshot_timer:
+        if not auto_generated:
             QMessageBox.information(self, "Screenshot", f"Screenshot saved to {full_path}")
     
-    def send_screenshot_to_api(self, screenshot_path):
+    def send_screenshot_to_api(self, screenshot_path, entry=None, auto_generated=None):
+        if auto_generated is None:
+            auto_generated = self.sender() == self.screenshot_timer
+        uploaded = False
         try:
             # Prepare the file for upload
             with open(screenshot_path, 'rb') as file:
@@ -389,7 +788,7 @@ class DashboardWindow(QWidget):
                 data = {
                     'timestamp': time.time(),
                     'user_id': self.user_data.get('user', {}).get('id', ''),
-                    'auto_generated': self.sender() == self.screenshot_timer
+                    'auto_generated': auto_generated
                 }
                 
                 # Send the request using the API service
@@ -400,24 +799,50 @@ class DashboardWindow(QWidget):
                     print("Failed to upload screenshot. No response received.")
                     return
                     
+                uploaded = True
                 print(f"Screenshot uploaded successfully: {screenshot_path}")
                     
         except Exception as e:
             print(f"Error sending screenshot to API: {str(e)}")
+        finally:
+            # Reflect the upload result in the history view
+            if entry is not None:
+                self.capture_history.set_status(entry, STATUS_UPLOADED if uploaded else STATUS_FAILED)
+                self.history_model.capture_updated(entry)
     
     def logout(self):
-        # Stop all timers
-        if self.is_running:
+        if self.logging_out:
+            return
+        self.logging_out = True
+        try:
+            self._logout()
+        finally:
+            self.logging_out = False
+    
+    def _logout(self):
+        # Stop all timers (timer/end is best effort: a 401 here must not start another logout)
+        if self.is_running or self.is_paused:
             self.end_timer()
         
         if self.auto_screenshot_enabled:
-            self.screenshot_timer.stop()
+            self.cancel_screenshot()
             self.auto_screenshot_enabled = False
             self.auto_screenshot_checkbox.setChecked(False)
         
+        self.policy_timer.stop()
+        
         # Clear API service auth token
         self.api.clear_auth_token()
         
+        # Forget the persisted session so the next launch asks for a login
+        self.session_store.clear()
+        self.pending_timer_state = None
+        self.switch_capture_history(None)
+        
+        # restore_session disables these until validation, which may never finish now
+        self.start_button.setEnabled(True)
+        self.screenshot_button.setEnabled(True)
+        
         self.user_data = None
         self.token = None
         self.refresh_token = None
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+import os
+import time
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+from PyQt5.QtCore import (Qt, QSize, QUrl, QBuffer, QByteArray, QIODevice, QObject,
+                          QRunnable, QThreadPool, QAbstractListModel, QModelIndex, pyqtSignal)
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QColor, QDesktopServices
+from utils.capture_history import STATUS_PENDING, STATUS_UPLOADED, STATUS_FAILED, STATUS_LOCAL
+from utils.thumbnail_cache import ThumbnailCache
+
+THUMBNAIL_SIZE = QSize(160, 100)
+
+STATUS_LABELS = {
+    STATUS_PENDING: "Uploading",
+    STATUS_UPLOADED: "Uploaded",
+    STATUS_FAILED: "Upload failed",
+    STATUS_LOCAL: "Not uploaded",
+}
+
+STATUS_COLORS = {
+    STATUS_PENDING: QColor("#b58900"),
+    STATUS_UPLOADED: QColor("#2e7d32"),
+    STATUS_FAILED: QColor("#c62828"),
+    STATUS_LOCAL: QColor("#757575"),
+}
+
+
+class ThumbnailSignals(QObject):
+    # (source path, thumbnail image or null QImage on failure)
+    loaded = pyqtSignal(str, QImage)
+
+
+class ThumbnailLoader(QRunnable):
+    """
+    Background job producing one thumbnail.
+    Reads from the disk cache when possible; otherwise decodes the screenshot at
+    thumbnail size with QImageReader (never holding a full-size QPixmap) and
+    stores the encoded result in the cache.
+    """
+
+    def __init__(self, path, cache, signals):
+        super().__init__()
+        self.path = path
+        self.cache = cache
+        self.signals = signals
+
+    def run(self):
+        variant = f"{THUMBNAIL_SIZE.width()}x{THUMBNAIL_SIZE.height()}"
+        key = ThumbnailCache.key_for(self.path, variant)
+        if key is None:
+            self.signals.loaded.emit(self.path, QImage())
+            return
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            image = QImage.fromData(cached)
+            if not image.isNull():
+                self.signals.loaded.emit(self.path, image)
+                return
+
+        reader = QImageReader(self.path)
+        original_size = reader.size()
+        if original_size.isValid():
+            reader.setScaledSize(original_size.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            self.signals.loaded.emit(self.path, QImage())
+            return
+        if image.width() > THUMBNAIL_SIZE.width() or image.height() > THUMBNAIL_SIZE.height():
+            # Formats without scaled decoding support
+            image = image.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "JPG", 80)
+        buffer.close()
+        self.cache.put(key, bytes(data))
+
+        self.signals.loaded.emit(self.path, image)
+
+
+class ScreenshotHistoryModel(QAbstractListModel):
+    """
+    List model over today's captures, newest first.
+
+    Thumbnails are requested from data() only when a view asks for a row's
+    decoration, which for a QListView means the row is visible. Decoded
+    thumbnails live in a small in-memory LRU on top of the persistent cache.
+    """
+
+    PathRole = Qt.UserRole + 1
+    StatusRole = Qt.UserRole + 2
+
+    def __init__(self, history, cache, parent=None, memory_items=300):
+        super().__init__(parent)
+        self.history = history
+        self.cache = cache
+        self.entries = []  # Oldest first; row 0 is the last entry
+        self.positions = {}  # path -> index in self.entries
+        self.pixmaps = OrderedDict()  # path -> QPixmap, least recently used first
+        self.memory_items = memory_items
+        self.pending = set()
+        self.missing = set()
+
+        self.placeholder = QPixmap(THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor("#e0e0e0"))
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)  # Keep thumbnailing from competing with the UI
+        self.signals = ThumbnailSignals()
+        self.signals.loaded.connect(self.on_thumbnail_loaded)
+
+    def set_history(self, history):
+        """Switch to another capture log (e.g. a different user) and reload"""
+        self.cancel_pending()
+        self.history = history
+        self.load()
+
+    def load(self):
+        """(Re)load today's captures from the history log"""
+        self.beginResetModel()
+        self.entries = self.history.load_today()
+        self.positions = {entry["path"]: position for position, entry in enumerate(self.entries)}
+        self.missing.clear()
+        self.endResetModel()
+
+    def _entry(self, row):
+        return self.entries[len(self.entries) - 1 - row]
+
+    def _index_for(self, path):
+        position = self.positions.get(path)
+        if position is None:
+            return QModelIndex()
+        return self.index(len(self.entries) - 1 - position)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.entries):
+            return None
+        entry = self._entry(index.row())
+        status = entry.get("status", STATUS_LOCAL)
+
+        if role == Qt.DisplayRole:
+            captured = time.strftime("%H:%M:%S", time.localtime(entry.get("timestamp", 0)))
+            return f"{captured} · {STATUS_LABELS.get(status, status)}"
+        if role == Qt.DecorationRole:
+            return self.thumbnail(entry["path"])
+        if role == Qt.ForegroundRole:
+            return STATUS_COLORS.get(status)
+        if role == Qt.ToolTipRole:
+            kind = "Automatic" if entry.get("auto_generated") else "Manual"
+            return f"{kind} capture\n{entry['path']}"
+        if role == self.PathRole:
+            return entry["path"]
+        if role == self.StatusRole:
+            return status
+        return None
+
+    def thumbnail(self, path):
+        pixmap = self.pixmaps.get(path)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(path)
+            return pixmap
+        if path not in self.pending and path not in self.missing:
+            self.pending.add(path)
+            self.pool.start(ThumbnailLoader(path, self.cache, self.signals))
+        return self.placeholder
+
+    def cancel_pending(self):
+        """Drop queued thumbnail jobs, e.g. rows that scrolled out of view; visible rows re-request"""
+        self.pool.clear()
+        self.pending.clear()
+
+    def on_thumbnail_loaded(self, path, image):
+        self.pending.discard(path)
+        if image.isNull():
+            self.missing.add(path)
+            return
+
+        self.pixmaps[path] = QPixmap.fromImage(image)
+        self.pixmaps.move_to_end(path)
+        while len(self.pixmaps) > self.memory_items:
+            self.pixmaps.popitem(last=False)
+
+        index = self._index_for(path)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def add_capture(self, entry):
+        """Insert a new capture at the top"""
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.positions[entry["path"]] = len(self.entries)
+        self.entries.append(entry)
+        self.endInsertRows()
+
+    def capture_updated(self, entry):
+        """Refresh a row after its upload status changed"""
+        index = self._index_for(entry["path"])
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.ForegroundRole, self.StatusRole])
+
+
+class ScreenshotHistoryView(QListView):
+    """Virtualized thumbnail grid; items are painted by the view, not one widget per capture"""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setViewMode(QListView.IconMode)
+        self.setIconSize(THUMBNAIL_SIZE)
+        self.setGridSize(QSize(THUMBNAIL_SIZE.width() + 20, THUMBNAIL_SIZE.height() + 40))
+        self.setUniformItemSizes(True)  # Lets the view lay out thousands of rows without querying each
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setWrapping(True)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setMinimumHeight(THUMBNAIL_SIZE.height() + 60)
+
+        # Forget queued work for rows that are scrolled past
+        self.verticalScrollBar().valueChanged.connect(model.cancel_pending)
+        self.doubleClicked.connect(self.open_capture)
+
+    def open_capture(self, index):
+        path = index.data(ScreenshotHistoryModel.PathRole)
+        if path and os.path.exists(path):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(path))
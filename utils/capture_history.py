@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# Upload status of a capture
+STATUS_PENDING = "pending"
+STATUS_UPLOADED = "uploaded"
+STATUS_FAILED = "failed"
+STATUS_LOCAL = "local"  # Saved but not sent (no session)
+
+
+class CaptureHistory:
+    """
+    Append-only log of today's screenshots and their upload status.
+
+    Each line of the log is a JSON record; a later record for the same path
+    overrides an earlier one, so status updates are a cheap append. Records
+    from previous days are dropped (compacted) when the log is loaded.
+
+    Logs are per user so someone logging in on a shared machine never sees the
+    previous user's captures. Without a log path (nobody logged in) nothing is
+    read or written.
+    """
+
+    def __init__(self, log_path: Optional[str]):
+        self.log_path = log_path
+        self.logger = logging.getLogger("capture_history")
+
+    @classmethod
+    def for_user(cls, config_dir: str, user_id: Any) -> "CaptureHistory":
+        """History for one user, stored under a hash of their id"""
+        if user_id in (None, ""):
+            return cls(None)
+        digest = hashlib.sha1(str(user_id).encode()).hexdigest()[:16]
+        return cls(os.path.join(config_dir, f"captures-{digest}.jsonl"))
+
+    @staticmethod
+    def _today() -> str:
+        return time.strftime("%Y-%m-%d")
+
+    def load_today(self) -> List[Dict[str, Any]]:
+        """Return today's captures, oldest first"""
+        if self.log_path is None:
+            return []
+        today = self._today()
+        entries: Dict[str, Dict[str, Any]] = {}
+        stale = False
+        line_count = 0
+        try:
+            with open(self.log_path, 'r') as file:
+                for line in file:
+                    line_count += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        stale = True
+                        continue
+                    if record.get("date") != today:
+                        stale = True
+                        continue
+                    entries.setdefault(record["path"], {}).update(record)
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            self.logger.warning(f"Could not read capture history: {str(e)}")
+            return []
+
+        captures = sorted(entries.values(), key=lambda entry: entry.get("timestamp", 0))
+        for entry in captures:
+            # An upload still pending from an earlier run was interrupted
+            if entry.get("status") == STATUS_PENDING:
+                entry["status"] = STATUS_FAILED
+                stale = True
+        # Rewrite the log when it holds old days or superseded status records
+        if stale or line_count > len(captures):
+            self._compact(captures)
+        return captures
+
+    def _compact(self, captures: List[Dict[str, Any]]) -> None:
+        temp_path = f"{self.log_path}.tmp"
+        try:
+            with open(temp_path, 'w') as file:
+                for entry in captures:
+                    file.write(json.dumps(entry) + "\n")
+            os.replace(temp_path, self.log_path)
+        except OSError as e:
+            self.logger.warning(f"Could not compact capture history: {str(e)}")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self.log_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, 'a') as file:
+                file.write(json.dumps(record) + "\n")
+        except OSError as e:
+            self.logger.warning(f"Could not write capture history: {str(e)}")
+
+    def record(self, path: str, auto_generated: bool, status: str = STATUS_PENDING,
+               timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Log a new capture and return its entry"""
+        entry = {
+            "path": path,
+            "date": self._today(),
+            "timestamp": timestamp or time.time(),
+            "auto_generated": auto_generated,
+            "status": status,
+        }
+        self._append(entry)
+        return entry
+
+    def set_status(self, entry: Dict[str, Any], status: str) -> None:
+        """Update a capture's upload status in place and in the log"""
+        entry["status"] = status
+        self._append({"path": entry["path"], "date": entry["date"], "status": status})
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Tunable settings: name -> (type, default, minimum, maximum)
+# Each can be set from the environment as the upper-cased name (e.g. SCREENSHOT_INTERVAL).
+SETTINGS: Dict[str, Tuple[type, Any, Any, Any]] = {
+    "screenshot_interval": (float, 180.0, 10.0, 24 * 60 * 60),
+    "heartbeat_interval": (float, 60.0, 5.0, 60 * 60),
+    "schedule_jitter": (float, 0.2, 0.0, 0.9),
+    "screenshot_initial_delay_max": (float, 60 * 60, 0.0, 60 * 60),
+    "screenshot_sample_rate": (float, 1.0, 0.01, 1.0),
+    "screenshot_format": (str, "PNG", None, None),
+    "screenshot_quality": (int, -1, -1, 100),
+    "screenshot_scale": (float, 1.0, 0.1, 1.0),
+    "thumbnail_cache_mb": (float, 50.0, 1.0, 2048.0),
+    "request_timeout": (float, 10.0, 1.0, 120.0),
+    "max_retries": (int, 3, 0, 10),
+    "policy_endpoint": (str, "config/policy", None, None),
+    "policy_ttl": (float, 15 * 60, 60.0, 24 * 60 * 60),
+    "event_channel_url": (str, "", None, None),
+    "timer_restore_max_gap": (float, 15 * 60, 0.0, 24 * 60 * 60),
+}
+
+SCREENSHOT_FORMATS = {"PNG", "JPG", "JPEG", "WEBP"}
+
+# Settings the remote policy may not override. The event channel URL receives the
+# bearer token, so only the environment or the local config file may point it elsewhere.
+LOCAL_ONLY_SETTINGS = {"event_channel_url"}
+
+ConfigListener = Callable[[Dict[str, Any]], None]
+
+
+def get_config_dir() -> str:
+    """Directory for the local config file and cached remote policy"""
+    return os.getenv('CONFIG_DIR') or os.path.join(os.path.expanduser("~"), ".time_tracker")
+
+
+def coerce_setting(name: str, value: Any) -> Any:
+    """
+    Convert a raw value (from env, file or server) to the setting's type and bounds
+
+    Raises:
+        KeyError: if the setting is unknown
+        ValueError: if the value cannot be converted
+    """
+    kind, _, minimum, maximum = SETTINGS[name]
+    if kind is str:
+        value = str(value).strip()
+        if name == "screenshot_format":
+            value = value.upper()
+            if value not in SCREENSHOT_FORMATS:
+                raise ValueError(f"Unsupported screenshot format: {value}")
+        return value
+
+    value = kind(value)
+    if minimum is not None:
+        value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return value
+
+
+class AppConfig:
+    """
+    Layered application settings.
+    Layers, lowest to highest priority:
+    - Built-in defaults (SETTINGS)
+    - Environment variables / .env
+    - Local config file (config.json in the config directory)
+    - Remote policy pushed by the server, cached on disk (policy_cache.json);
+      settings in LOCAL_ONLY_SETTINGS are never taken from it
+
+    The remote policy wins so operators can throttle the fleet without a new build.
+    Components subscribe to be told about changed values and apply them live.
+    """
+
+    def __init__(self, config_dir: Optional[str] = None):
+        self.config_dir = config_dir or get_config_dir()
+        self.config_file = os.getenv('CONFIG_FILE') or os.path.join(self.config_dir, "config.json")
+        self.cache_file = os.path.join(self.config_dir, "policy_cache.json")
+        self.logger = logging.getLogger("app_config")
+        self.lock = threading.RLock()
+        self.listeners = []
+
+        self.local: Dict[str, Any] = {name: default for name, (_, default, _, _) in SETTINGS.items()}
+        self.local.update(self._validate(self._read_env(), "environment"))
+        self.local.update(self._validate(self._read_json(self.config_file), self.config_file))
+
+        cached = self._read_json(self.cache_file)
+        self.remote: Dict[str, Any] = self._validate(cached.get("settings", {}), self.cache_file, remote=True)
+        self.remote_fetched_at: float = cached.get("fetched_at", 0)
+
+        self.values = {**self.local, **self.remote}
+
+    def _read_env(self) -> Dict[str, Any]:
+        return {name: os.environ[name.upper()] for name in SETTINGS if os.getenv(name.upper())}
+
+    def _read_json(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable config file {path}: {str(e)}")
+            return {}
+
+    def _validate(self, raw: Dict[str, Any], source: str, remote: bool = False) -> Dict[str, Any]:
+        """Keep only known settings with usable values (and, for remote sources, that may be pushed)"""
+        settings = {}
+        for name, value in raw.items():
+            if remote and name in LOCAL_ONLY_SETTINGS:
+                self.logger.warning(f"Ignoring setting '{name}' from {source}: it can only be set locally")
+                continue
+            try:
+                settings[name] = coerce_setting(name, value)
+            except KeyError:
+                self.logger.warning(f"Ignoring unknown setting '{name}' from {source}")
+            except (TypeError, ValueError) as e:
+                self.logger.warning(f"Ignoring invalid setting '{name}' from {source}: {str(e)}")
+        return settings
+
+    def get(self, name: str) -> Any:
+        with self.lock:
+            return self.values[name]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def subscribe(self, listener: ConfigListener) -> None:
+        """
+        Register a callback that receives a dict of changed settings.
+
+        Bound methods are held weakly so short-lived objects (e.g. an APIService
+        created for a single login) don't stay alive just because they subscribed.
+        """
+        with self.lock:
+            if hasattr(listener, "__self__"):
+                self.listeners.append(weakref.WeakMethod(listener))
+            else:
+                self.listeners.append(lambda: listener)
+
+    def merged(self, remote: Dict[str, Any]) -> Dict[str, Any]:
+        """Effective settings if `remote` were the remote layer, without applying or caching it"""
+        with self.lock:
+            return {**self.local, **self._validate(remote, "remote policy", remote=True)}
+
+    def seconds_until_refresh(self) -> float:
+        """Time left before the cached remote policy is older than policy_ttl (0 if stale)"""
+        with self.lock:
+            age = time.time() - self.remote_fetched_at
+        return max(0.0, self.get("policy_ttl") - age)
+
+    def apply_remote(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the remote policy layer, persist it, and notify listeners
+
+        Returns:
+            Dict of settings whose effective value changed
+        """
+        remote = self._validate(raw, "remote policy", remote=True)
+        with self.lock:
+            self.remote = remote
+            self.remote_fetched_at = time.time()
+            new_values = {**self.local, **remote}
+            changes = {name: value for name, value in new_values.items() if self.values.get(name) != value}
+            self.values = new_values
+        self._write_cache()
+        if changes:
+            self.logger.info(f"Remote policy changed settings: {changes}")
+            self._notify(changes)
+        return changes
+
+    def _write_cache(self) -> None:
+        """Write the cache atomically so a crash mid-write never leaves a corrupt file"""
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            temp_path = f"{self.cache_file}.tmp"
+            with open(temp_path, 'w') as file:
+                json.dump({"fetched_at": self.remote_fetched_at, "settings": self.remote}, file)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not cache remote policy: {str(e)}")
+
+    def _notify(self, changes: Dict[str, Any]) -> None:
+        with self.lock:
+            listeners = [ref() for ref in self.listeners]
+            self.listeners = [ref for ref, listener in zip(self.listeners, listeners) if listener is not None]
+        for listener in listeners:
+            if listener is None:
+                continue
+            try:
+                listener(changes)
+            except Exception as e:
+                self.logger.error(f"Config listener failed: {str(e)}")
+
+    def fetch_remote(self, api) -> bool:
+        """
+        Fetch the remote policy through an authenticated APIService
+
+        Returns:
+            bool: True if a policy was received and applied
+        """
+        endpoint = self.get("policy_endpoint")
+        if not endpoint:
+            return False
+
+        response = api.get(endpoint)
+        if response is None:
+            self.logger.info("Remote policy unavailable, keeping cached settings")
+            return False
+
+        settings = self.parse_policy_response(response)
+        if settings is None:
+            return False
+
+        self.apply_remote(settings)
+        return True
+
+    def parse_policy_response(self, response) -> Optional[Dict[str, Any]]:
+        """Extract the raw settings dict from a config/policy response, None if malformed"""
+        try:
+            data = response.json()
+        except ValueError:
+            self.logger.warning("Remote policy response is not valid JSON")
+            return None
+
+        settings = data.get("data", data) if isinstance(data, dict) else None
+        if not isinstance(settings, dict):
+            self.logger.warning("Remote policy response has an unexpected shape")
+            return None
+        return settings
+
+
+_config: Optional[AppConfig] = None
+_config_lock = threading.Lock()
+
+
+def get_config() -> AppConfig:
+    """Return the process-wide configuration, loading it on first use"""
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = AppConfig()
+        return _config
@@ -0,0 +1,78 @@
+import random
+from typing import Optional
+
+
+class SchedulePolicy:
+    """
+    Decides when a client captures screenshots and sends timer heartbeats.
+
+    Fixed schedules make every client in an office fire at the same instant
+    once they all press Start together. This policy spreads the load:
+    - A random per-client phase offset for the first screenshot and heartbeat,
+      spread over a full interval (the screenshot offset is capped at initial_delay_max)
+    - Jittered intervals within [interval * (1 - jitter), interval * (1 + jitter)]
+    - Optional randomized sampling that skips a fraction of scheduled captures
+
+    All values are in seconds unless the method name says otherwise.
+    """
+
+    def __init__(self, screenshot_interval: float = 180, heartbeat_interval: float = 60,
+                 jitter: float = 0.2, initial_delay_max: float = 60 * 60,
+                 sample_rate: float = 1.0, seed: Optional[int] = None):
+        if screenshot_interval <= 0 or heartbeat_interval <= 0:
+            raise ValueError("Intervals must be positive")
+        if not 0 <= jitter < 1:
+            raise ValueError("Jitter must be in the range [0, 1)")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("Sample rate must be in the range (0, 1]")
+
+        self.screenshot_interval = screenshot_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.jitter = jitter
+        self.initial_delay_max = max(0, initial_delay_max)
+        self.sample_rate = sample_rate
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_config(cls, config) -> "SchedulePolicy":
+        """Build a policy from the application settings (see utils.config)"""
+        policy = cls()
+        policy.configure(config)
+        return policy
+
+    def configure(self, config) -> None:
+        """Apply interval, jitter and sampling settings; used again when they change live"""
+        self.screenshot_interval = config.get("screenshot_interval")
+        self.heartbeat_interval = config.get("heartbeat_interval")
+        self.jitter = config.get("schedule_jitter")
+        self.initial_delay_max = config.get("screenshot_initial_delay_max")
+        self.sample_rate = config.get("screenshot_sample_rate")
+
+    def _jittered(self, interval: float) -> float:
+        """Return the interval scaled by a random factor within the jitter bounds"""
+        return interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def first_screenshot_delay(self) -> float:
+        """Phase offset before the first screenshot of a session"""
+        return self.rng.uniform(0, min(self.screenshot_interval, self.initial_delay_max))
+
+    def next_screenshot_delay(self) -> float:
+        """Delay between two consecutive scheduled screenshots"""
+        return self._jittered(self.screenshot_interval)
+
+    def first_heartbeat_delay(self) -> int:
+        """Phase offset, in whole seconds of elapsed time, before the first heartbeat"""
+        return self.rng.randint(1, max(1, int(self.heartbeat_interval)))
+
+    def next_heartbeat_delay(self) -> int:
+        """Whole seconds of elapsed time between two consecutive heartbeats"""
+        return max(1, round(self._jittered(self.heartbeat_interval)))
+
+    def should_capture(self) -> bool:
+        """Randomized sampling: decide whether a scheduled capture actually runs"""
+        return self.sample_rate >= 1 or self.rng.random() < self.sample_rate
+
+    @staticmethod
+    def to_ms(seconds: float) -> int:
+        """Convert seconds to the millisecond integers QTimer expects"""
+        return max(1, int(seconds * 1000))
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import keyring
+except ImportError:  # Optional: fall back to an owner-only file
+    keyring = None
+
+KEYRING_SERVICE = "time-tracker"
+KEYRING_USERNAME = "refresh_token"
+
+
+class SessionStore:
+    """
+    Persists what is needed to skip the login screen on the next launch.
+
+    - The refresh token goes to the OS keychain through `keyring` when it is
+      installed and has a usable backend, otherwise to a file only the current
+      user can read (0600). The access token is never written to disk.
+    - The cached user profile and the running timer session go to session.json.
+    """
+
+    def __init__(self, config_dir: str):
+        self.config_dir = config_dir
+        self.session_file = os.path.join(config_dir, "session.json")
+        self.token_file = os.path.join(config_dir, "session_token")
+        self.logger = logging.getLogger("session_store")
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.session_file, 'r') as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable session file: {str(e)}")
+            return {}
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            temp_path = f"{self.session_file}.tmp"
+            with open(temp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.session_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save session: {str(e)}")
+
+    def _save_refresh_token(self, refresh_token: str) -> bool:
+        """Store the refresh token; returns True if it went to the OS keychain"""
+        if keyring is not None:
+            try:
+                keyring.set_password(KEYRING_SERVICE, KEYRING_USERNAME, refresh_token)
+                self._remove_token_file()
+                return True
+            except Exception as e:
+                self.logger.warning(f"Keychain unavailable, using a private file: {str(e)}")
+
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            fd = os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as file:
+                file.write(refresh_token)
+            os.chmod(self.token_file, 0o600)  # Tighten a file created by an older version
+        except OSError as e:
+            self.logger.warning(f"Could not save refresh token: {str(e)}")
+        return False
+
+    def _load_refresh_token(self, in_keyring: bool) -> Optional[str]:
+        if in_keyring:
+            if keyring is None:
+                return None
+            try:
+                return keyring.get_password(KEYRING_SERVICE, KEYRING_USERNAME)
+            except Exception as e:
+                self.logger.warning(f"Could not read refresh token from keychain: {str(e)}")
+                return None
+        try:
+            with open(self.token_file, 'r') as file:
+                return file.read().strip() or None
+        except OSError:
+            return None
+
+    def _remove_token_file(self) -> None:
+        try:
+            os.remove(self.token_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Could not remove refresh token file: {str(e)}")
+
+    def save_login(self, refresh_token: str, user: Dict[str, Any]) -> None:
+        """Persist the refresh token and profile after a login or token refresh"""
+        data = self._read()
+        if data.get("user", {}).get("id") != user.get("id"):
+            data.pop("timer", None)  # A different user never inherits a timer session
+        data["token_in_keyring"] = self._save_refresh_token(refresh_token)
+        data["user"] = user
+        data["saved_at"] = time.time()
+        self._write(data)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the saved session, or None if there isn't a complete one
+
+        Returns:
+            Dict with "refresh_token", "user" and optionally "timer"
+        """
+        data = self._read()
+        if not data.get("user"):
+            return None
+        refresh_token = self._load_refresh_token(data.get("token_in_keyring", False))
+        if not refresh_token:
+            return None
+        return {"refresh_token": refresh_token, "user": data["user"], "timer": data.get("timer")}
+
+    def save_timer(self, timer_state: Optional[Dict[str, Any]]) -> None:
+        """Persist the timer session (None once it has ended)"""
+        data = self._read()
+        if not data.get("user"):
+            return
+        if timer_state is None:
+            data.pop("timer", None)
+        else:
+            data["timer"] = {**timer_state, "saved_at": time.time()}
+        self._write(data)
+
+    def clear(self) -> None:
+        """Forget everything on logout or when the server rejects the refresh token"""
+        data = self._read()
+        if data.get("token_in_keyring") and keyring is not None:
+            try:
+                keyring.delete_password(KEYRING_SERVICE, KEYRING_USERNAME)
+            except Exception:
+                pass
+        self._remove_token_file()
+        try:
+            os.remove(self.session_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Could not remove session file: {str(e)}")
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+
+class ThumbnailCache:
+    """
+    Persistent, size-bounded cache of encoded thumbnail images.
+
+    Entries are files keyed by a hash of the source path, its size and modification
+    time, so a changed screenshot gets a fresh thumbnail. When the total size goes
+    over the limit the least recently used entries (by file mtime) are evicted.
+    Safe to use from background loader threads.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger("thumbnail_cache")
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """Change the size limit, evicting right away if the cache is now over it"""
+        with self.lock:
+            self.max_bytes = max_bytes
+            over_limit = self.total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    @staticmethod
+    def key_for(source_path: str, variant: str = "") -> Optional[str]:
+        """Cache key for a source image, or None if the source no longer exists"""
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}|{variant}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)  # Mark as recently used
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            with self.lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(temp_path, path)
+                self.total_bytes += len(data) - previous
+                over_limit = self.total_bytes > self.max_bytes
+            if over_limit:
+                self.evict()
+        except OSError as e:
+            self.logger.warning(f"Could not write thumbnail {key}: {str(e)}")
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache is at 90% of its limit"""
+        with self.lock:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.is_file() and entry.name.endswith(".jpg")]
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in entries)
+            target = self.max_bytes * 0.9
+            for entry in entries:
+                if total <= target:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    total -= size
+                except OSError:
+                    pass
+            self.total_bytes = total